@@ -0,0 +1,109 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+INDEX_NAME = "bm25_index.json"
+
+K1 = 1.5
+B = 0.75
+
+# "25,000" and "25000" should match, so thousands separators are dropped first
+_NUMBER_SEP = re.compile(r"(?<=\d),(?=\d)")
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(_NUMBER_SEP.sub("", text.casefold()))
+
+
+# =========================
+# INVERTED INDEX
+# =========================
+class BM25Index:
+    def __init__(self, docs=None):
+        # chunk id -> {term: term frequency}; postings are derived from it
+        self.docs = {}
+        self.postings = defaultdict(dict)
+        self.doc_lens = {}
+        self.total_len = 0
+        for doc_id, terms in (docs or {}).items():
+            self._insert(doc_id, terms)
+        self.dirty = False
+
+    def _insert(self, doc_id, terms):
+        self.docs[doc_id] = terms
+        self.doc_lens[doc_id] = sum(terms.values())
+        self.total_len += self.doc_lens[doc_id]
+        for term, tf in terms.items():
+            self.postings[term][doc_id] = tf
+        self.dirty = True
+
+    def add(self, ids, documents):
+        for doc_id, text in zip(ids, documents):
+            if doc_id in self.docs:
+                self.remove([doc_id])
+            self._insert(doc_id, dict(Counter(tokenize(text))))
+
+    def remove(self, ids):
+        for doc_id in ids:
+            terms = self.docs.pop(doc_id, None)
+            if terms is None:
+                continue
+            self.total_len -= self.doc_lens.pop(doc_id)
+            self.dirty = True
+            for term in terms:
+                posting = self.postings[term]
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query, k=20):
+        n = len(self.docs)
+        if not n:
+            return []
+        avg_len = self.total_len / n
+
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                scores[doc_id] += idf * tf * (K1 + 1) / (
+                    tf + K1 * (1 - B + B * self.doc_lens[doc_id] / avg_len)
+                )
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    # =========================
+    # PERSISTENCE
+    # =========================
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"docs": self.docs}, f)
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f).get("docs"))
+        except (OSError, ValueError):
+            return cls()
+
+
+def sync_index(index, collection, wanted_ids):
+    # Keeps the lexical index on exactly the chunk ids stored in Chroma.
+    # Chunks stored before the index file existed are fetched back by id.
+    index.remove([doc_id for doc_id in list(index.docs) if doc_id not in wanted_ids])
+
+    missing = [doc_id for doc_id in wanted_ids if doc_id not in index.docs]
+    if missing:
+        stored = collection.get(ids=missing, include=["documents"])
+        index.add(stored["ids"], stored["documents"])
+    return index
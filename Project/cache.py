@@ -0,0 +1,131 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+QUERY_CACHE_SIZE = 512
+ANSWER_CACHE_TTL = 7 * 24 * 3600
+ANSWER_CACHE_MAX_ENTRIES = 2000
+
+
+def normalize_question(text):
+    # Case, punctuation and spacing don't change the question being asked.
+    # Only Unicode punctuation is dropped so Devanagari vowel signs survive.
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch
+        for ch in text
+    )
+    return " ".join(text.split())
+
+
+# =========================
+# LEVEL 1: QUERY EMBEDDING LRU (IN MEMORY)
+# =========================
+class QueryEmbeddingCache:
+    def __init__(self, max_size=QUERY_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, embed_model, text):
+        return self.embed_with_hit(embed_model, text)[0]
+
+    def embed_with_hit(self, embed_model, text):
+        # Returns (embedding, True if it came from the cache)
+        embedding = self.get(text)
+        if embedding is not None:
+            return embedding, True
+        embedding = embed_model.embed_query(text)
+        self.put(text, embedding)
+        return embedding, False
+
+    def get(self, text):
+        # Counts a hit or a miss; callers that embed elsewhere (rag_service.py)
+        # put the result back themselves
+        key = normalize_question(text)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, text, embedding):
+        key = normalize_question(text)
+        with self._lock:
+            self._items[key] = embedding
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+# =========================
+# LEVEL 2: ANSWER CACHE (SQLITE ON DISK)
+# =========================
+class AnswerCache:
+    def __init__(self, path, ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                corpus_version TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(question, language, corpus_version):
+        raw = "\x00".join([normalize_question(question), language, corpus_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, question, language, corpus_version):
+        key = self.make_key(question, language, corpus_version)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer, created FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, question, language, corpus_version, answer):
+        key = self.make_key(question, language, corpus_version)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                (key, corpus_version, answer, now, now)
+            )
+            # Answers from an older corpus can never be hit again
+            self._conn.execute(
+                "DELETE FROM answers WHERE corpus_version != ? OR created < ?",
+                (corpus_version, now - self.ttl)
+            )
+            self._conn.execute("""
+                DELETE FROM answers WHERE key IN (
+                    SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
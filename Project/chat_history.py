@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+HISTORY_TTL = 30 * 24 * 3600
+
+
+# =========================
+# CHAT HISTORY (SQLITE ON DISK)
+# =========================
+# One row per question/answer turn, keyed by an autoincrement id and indexed
+# by (chat, id): reading the latest page, deleting a turn and starting a new
+# chat never touch the rest of the conversation.
+class ChatHistory:
+    def __init__(self, path, ttl=HISTORY_TTL):
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS turns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                language TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_chat ON turns (chat, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS turns_created ON turns (created)")
+        # Abandoned chats are dropped once per process, never on the request path
+        self._conn.execute("DELETE FROM turns WHERE created < ?", (time.time() - ttl,))
+        self._conn.commit()
+
+    @staticmethod
+    def new_chat_id():
+        # A new chat is just a new key; the old turns are left for the TTL
+        return uuid.uuid4().hex
+
+    def add_turn(self, chat, question, answer, language):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO turns (chat, question, answer, language, created) VALUES (?, ?, ?, ?, ?)",
+                (chat, question, answer, language, time.time())
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def delete_turn(self, turn_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM turns WHERE id = ?", (turn_id,))
+            self._conn.commit()
+
+    def count(self, chat):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM turns WHERE chat = ?", (chat,)).fetchone()[0]
+
+    def latest(self, chat, limit, offset=0):
+        # Newest first: turns offset .. offset + limit counted from the end
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, question, answer FROM turns WHERE chat = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (chat, limit, offset)
+            ).fetchall()
+        return [{"id": row[0], "question": row[1], "answer": row[2]} for row in rows]
@@ -1,12 +1,19 @@
 import streamlit as st
-import chromadb
-import os
-import uuid
+import time
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.embeddings import init_embeddings
-from langchain.chat_models import init_chat_model
+import metrics
+import rag
+import resources
+
+# Heavy libraries (langchain, chromadb, sentence-transformers) are imported
+# lazily inside resources.py, once per process
+RUN_START = time.perf_counter()
+resources.warm_up()
+metrics.start_http_server()
+
+# Turns rendered in the chat area (more on request) and listed per sidebar page
+CHAT_WINDOW = 10
+SIDEBAR_PAGE_SIZE = 10
 
 # =========================
 # STREAMLIT CONFIG
@@ -74,86 +81,41 @@ st.divider()
 # =========================
 # SESSION STATE
 # =========================
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-
-if "pdfs_ingested" not in st.session_state:
-    st.session_state.pdfs_ingested = False
-
-if "language" not in st.session_state:
-    st.session_state.language = "English"
-
-# =========================
-# EMBEDDINGS
-# =========================
-embed_model = init_embeddings(
-    model="huggingface:sentence-transformers/all-MiniLM-L6-v2"
-)
+# Conversation turns live in SQLite (chat_history.py); the session only keeps
+# the chat id (also in the URL, so a reload resumes the chat) and view state
+history = resources.get_chat_history()
 
-# =========================
-# LLM
-# =========================
-llm = init_chat_model(
-    model="llama-3.3-70b-versatile",
-    model_provider="groq",
-    api_key=os.getenv("GROQ_API_KEY")
-)
+if "chat_id" not in st.session_state:
+    st.session_state.chat_id = st.query_params.get("chat") or history.new_chat_id()
+    st.query_params["chat"] = st.session_state.chat_id
 
-# =========================
-# CHROMA DB
-# =========================
-DB_PATH = "./chroma_db"
-chroma_client = chromadb.PersistentClient(path=DB_PATH)
-collection = chroma_client.get_or_create_collection("sunbeam_docs")
+if "history_window" not in st.session_state:
+    st.session_state.history_window = CHAT_WINDOW
 
-# =========================
-# PDF INGESTION (NO MESSAGE)
-# =========================
-def ingest_pdfs(pdf_folder="pdfs"):
-    if not os.path.exists(pdf_folder):
-        return
+if "history_page" not in st.session_state:
+    st.session_state.history_page = 0
 
-    existing = collection.get()
-    if existing and existing.get("ids"):
-        collection.delete(ids=existing["ids"])
+if "language" not in st.session_state:
+    st.session_state.language = "English"
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800,
-        chunk_overlap=150
-    )
+if "last_timing" not in st.session_state:
+    st.session_state.last_timing = None
 
-    for file in os.listdir(pdf_folder):
-        if file.lower().endswith(".pdf"):
-            loader = PyPDFLoader(os.path.join(pdf_folder, file))
-            pages = loader.load()
-            chunks = splitter.split_documents(pages)
-
-            documents, metadatas, ids = [], [], []
-
-            for chunk in chunks:
-                documents.append(chunk.page_content.strip())
-                metadatas.append({
-                    "source": file,
-                    "page": chunk.metadata.get("page", 0)
-                })
-                ids.append(str(uuid.uuid4()))
-
-            embeddings = embed_model.embed_documents(documents)
-
-            collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                embeddings=embeddings,
-                ids=ids
-            )
+if "last_route" not in st.session_state:
+    st.session_state.last_route = None
 
 # =========================
 # AUTO INGEST
 # =========================
-if not st.session_state.pdfs_ingested:
+# Only the very first build blocks; later ones run in the background (once
+# per host) while queries keep using the live index version
+if not rag.has_index():
     with st.spinner("📄 Preparing knowledge base..."):
-        ingest_pdfs("pdfs")
-        st.session_state.pdfs_ingested = True
+        rag.ingest_pdfs("pdfs")
+else:
+    rag.start_background_ingest("pdfs")
+
+run_stats = resources.record_run(time.perf_counter() - RUN_START)
 
 # =========================
 # SIDEBAR
@@ -177,35 +139,106 @@ with st.sidebar:
     st.divider()
     st.markdown("<div class='sidebar-title'>💬 Chat History</div>", unsafe_allow_html=True)
 
-    if not st.session_state.messages:
+    chat_id = st.session_state.chat_id
+    total_turns = history.count(chat_id)
+    if not total_turns:
         st.info("No conversations yet")
     else:
-        i, q_no = 0, 1
-        while i < len(st.session_state.messages):
-            msg = st.session_state.messages[i]
-            if msg["role"] == "user":
-                with st.expander(f"Q{q_no}: {msg['content'][:60]}"):
-                    st.write(msg["content"])
-                    if st.selectbox("Action", ["Keep", "Delete"], key=f"del_{i}") == "Delete":
-                        del st.session_state.messages[i:i+2]
-                        st.rerun()
-                q_no += 1
-                i += 2
-            else:
-                i += 1
+        page_count = (total_turns + SIDEBAR_PAGE_SIZE - 1) // SIDEBAR_PAGE_SIZE
+        page = min(st.session_state.history_page, page_count - 1)
+        offset = page * SIDEBAR_PAGE_SIZE
+
+        # Newest first, one page of widgets however long the chat gets
+        for n, turn in enumerate(history.latest(chat_id, SIDEBAR_PAGE_SIZE, offset)):
+            with st.expander(f"Q{total_turns - offset - n}: {turn['question'][:60]}"):
+                st.write(turn["question"])
+                if st.button("🗑️ Delete", key=f"del_{turn['id']}"):
+                    history.delete_turn(turn["id"])
+                    st.rerun()
+
+        if page_count > 1:
+            newer, label, older = st.columns([1, 2, 1])
+            if newer.button("◀", disabled=page == 0, use_container_width=True):
+                st.session_state.history_page = page - 1
+                st.rerun()
+            label.caption(f"Page {page + 1} of {page_count}")
+            if older.button("▶", disabled=page >= page_count - 1, use_container_width=True):
+                st.session_state.history_page = page + 1
+                st.rerun()
 
     st.divider()
     if st.button("🆕 Start New Chat", use_container_width=True):
-        st.session_state.messages = []
+        st.session_state.chat_id = history.new_chat_id()
+        st.query_params["chat"] = st.session_state.chat_id
+        st.session_state.history_window = CHAT_WINDOW
+        st.session_state.history_page = 0
         st.rerun()
 
+    st.caption(
+        f"⏱️ Cold start {run_stats['cold_seconds']:.2f}s · "
+        f"this rerun {run_stats['last_seconds']:.2f}s"
+    )
+    if st.session_state.last_timing:
+        st.caption(
+            f"💬 Last answer: first token {st.session_state.last_timing['ttft']:.2f}s · "
+            f"total {st.session_state.last_timing['total']:.2f}s"
+        )
+    if st.session_state.last_route:
+        route = st.session_state.last_route
+        scope = ", ".join(route["families"]) if route["scoped"] and not route["fallback"] else "all documents"
+        st.caption(f"🧭 Searched: {scope}")
+    if rag.ingest_status()["state"] == "running":
+        st.caption("🔄 Updating the knowledge base; answers use the current version until it is ready")
+
+    if metrics.ENABLED:
+        with st.expander("🔧 Performance (debug)"):
+            stages = metrics.snapshot()
+            if not stages:
+                st.caption("No spans recorded yet")
+            else:
+                st.dataframe(
+                    [
+                        {
+                            "stage": name,
+                            "count": stage["count"],
+                            "avg ms": round(1000 * stage["seconds"] / stage["count"], 1),
+                            "last ms": round(1000 * stage["last"], 1),
+                            **stage["counters"],
+                        }
+                        for name, stage in sorted(stages.items())
+                    ],
+                    hide_index=True,
+                    use_container_width=True
+                )
+                st.download_button(
+                    "Prometheus text", metrics.prometheus_text(),
+                    file_name="sunbeam_metrics.prom", use_container_width=True
+                )
+                st.download_button(
+                    "JSON lines", metrics.jsonl_text(),
+                    file_name="sunbeam_spans.jsonl", use_container_width=True
+                )
+
 # =========================
 # CHAT DISPLAY
 # =========================
-for msg in st.session_state.messages:
-    icon = "🧑‍🎓" if msg["role"] == "user" else "🎓"
-    with st.chat_message(msg["role"], avatar=icon):
-        st.markdown(msg["content"])
+def render_turn(question, answer):
+    with st.chat_message("user", avatar="🧑‍🎓"):
+        st.markdown(question)
+    with st.chat_message("assistant", avatar="🎓"):
+        st.markdown(answer)
+
+
+# Only the most recent window is rendered; older turns load on request
+with metrics.span("render.history", messages=0) as span:
+    window = history.latest(st.session_state.chat_id, st.session_state.history_window)
+    if total_turns > len(window):
+        if st.button(f"⬆️ Show earlier messages ({total_turns - len(window)} more)"):
+            st.session_state.history_window += CHAT_WINDOW
+            st.rerun()
+    for turn in reversed(window):
+        render_turn(turn["question"], turn["answer"])
+    span.count("messages", 2 * len(window))
 
 # =========================
 # USER INPUT
@@ -215,34 +248,38 @@ user_input = st.chat_input(
 )
 
 if user_input:
-    st.session_state.messages.append({"role": "user", "content": user_input})
-
-    query_embedding = embed_model.embed_query(user_input)
-    results = collection.query(query_embeddings=[query_embedding], n_results=8)
-
-    context = "\n\n".join(results["documents"][0]) if results["documents"] else ""
-
-    prompt = f"""
-You are an academic counselor chatbot for Sunbeam Institute.
-
-RULES:
-- Answer ONLY using the CONTEXT
-- Answer strictly in {st.session_state.language}
-- If missing, say:
-  "The requested information is not available in the provided documents."
-
-Context:
-{context}
+    with st.chat_message("user", avatar="🧑‍🎓"):
+        st.markdown(user_input)
+
+    # Retrieval and answering run in the shared RAG service (rag_service.py);
+    # repeated questions (same wording, language and corpus) skip the LLM
+    service = resources.get_rag_service()
+    answer, corpus_version = service.cached_answer(
+        user_input, st.session_state.language, chat=st.session_state.chat_id
+    )
 
-Question:
-{user_input}
+    with st.chat_message("assistant", avatar="🎓"):
+        if answer is not None:
+            st.markdown(answer)
+            st.session_state.last_timing = None
+        else:
+            # Follow-ups are retrieved in the context of this chat's last turns
+            prompt, _, stats = service.prepare_prompt_sync(
+                user_input, st.session_state.language, chat=st.session_state.chat_id
+            )
+            st.session_state.last_route = stats["route"]
 
-Answer:
-"""
+            timing = {}
+            if resources.STREAM_ANSWERS:
+                # Tokens are rendered as they arrive; the full text is returned at the end
+                answer = st.write_stream(service.stream_answer(prompt, timing))
+            else:
+                answer = service.complete(prompt, timing)
+                st.markdown(answer)
 
-    response = llm.invoke(prompt)
+            st.session_state.last_timing = timing
+            service.store_answer(user_input, st.session_state.language, corpus_version, answer)
 
-    st.session_state.messages.append(
-        {"role": "assistant", "content": response.content}
-    )
-    st.rerun()
\ No newline at end of file
+    history.add_turn(st.session_state.chat_id, user_input, answer, st.session_state.language)
+    st.session_state.history_page = 0
+    st.rerun()
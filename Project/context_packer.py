@@ -0,0 +1,144 @@
+import logging
+import math
+import os
+
+logger = logging.getLogger(__name__)
+
+# Fused candidates handed to the packer (the old fixed n_results)
+CANDIDATES = 8
+# Prompt budget for the joined context, in estimated tokens
+TOKEN_BUDGET = int(os.getenv("SUNBEAM_CONTEXT_TOKENS", "1200"))
+# 1.0 = pure relevance, 0.0 = pure diversity
+MMR_LAMBDA = 0.7
+# Shortest suffix/prefix match treated as splitter overlap
+MIN_OVERLAP = 30
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English; close enough for budgeting
+    return (len(text) + 3) // 4
+
+
+def cosine(a, b):
+    dot = sum(float(x) * float(y) for x, y in zip(a, b))
+    norm = math.sqrt(sum(float(x) ** 2 for x in a)) * math.sqrt(sum(float(y) ** 2 for y in b))
+    return dot / norm if norm else 0.0
+
+
+# =========================
+# MERGE OVERLAPPING CHUNKS
+# =========================
+def _overlap(left, right):
+    for size in range(min(len(left), len(right)), MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_pair(a, b):
+    # Returns the merged text, or None if the two chunks don't overlap
+    if b in a:
+        return a
+    if a in b:
+        return b
+    size = _overlap(a, b)
+    if size:
+        return a + b[size:]
+    size = _overlap(b, a)
+    if size:
+        return b + a[size:]
+    return None
+
+
+def merge_overlapping(hits):
+    # Chunks from the same source and page (JSONL records: the same url and
+    # section) are stitched back together; text contained in another hit
+    # anywhere in the set is dropped
+    merged = []
+    for hit in hits:
+        hit = dict(hit)
+        key = tuple(hit["metadata"].get(field) for field in ("source", "page", "url", "course", "section"))
+        for other in merged:
+            if key == other["key"]:
+                text = _merge_pair(other["document"], hit["document"])
+            elif hit["document"] in other["document"]:
+                text = other["document"]
+            else:
+                continue
+            if text is not None:
+                other["document"] = text
+                other["ids"].append(hit["id"])
+                other["score"] = max(other["score"], hit["score"])
+                break
+        else:
+            hit["key"] = key
+            hit["ids"] = [hit["id"]]
+            merged.append(hit)
+
+    # A merge can make an earlier, separate entry redundant as well
+    return [
+        item for i, item in enumerate(merged)
+        if not any(
+            j != i and item["document"] in other["document"]
+            and (len(other["document"]) > len(item["document"]) or j < i)
+            for j, other in enumerate(merged)
+        )
+    ]
+
+
+# =========================
+# MMR SELECTION
+# =========================
+def mmr_order(items, query_embedding, lambda_=MMR_LAMBDA):
+    if query_embedding is None or any(item.get("embedding") is None for item in items):
+        return items
+
+    relevance = [cosine(query_embedding, item["embedding"]) for item in items]
+    remaining = list(range(len(items)))
+    order = []
+    while remaining:
+        def mmr_score(i):
+            redundancy = max(
+                (cosine(items[i]["embedding"], items[j]["embedding"]) for j in order),
+                default=0.0
+            )
+            return lambda_ * relevance[i] - (1 - lambda_) * redundancy
+
+        best = max(remaining, key=mmr_score)
+        order.append(best)
+        remaining.remove(best)
+    return [items[i] for i in order]
+
+
+# =========================
+# PACKING
+# =========================
+def pack_context(hits, query_embedding=None, token_budget=TOKEN_BUDGET):
+    # Returns (context string, stats dict)
+    raw_tokens = estimate_tokens("\n\n".join(hit["document"] for hit in hits))
+
+    selected, used = [], 0
+    for item in mmr_order(merge_overlapping(hits), query_embedding):
+        cost = estimate_tokens(item["document"]) + 1
+        if used + cost <= token_budget:
+            selected.append(item["document"])
+            used += cost
+        elif not selected:
+            # Never send an empty context just because the best hit is long
+            selected.append(item["document"][:token_budget * 4])
+            used = token_budget
+
+    context = "\n\n".join(selected)
+    stats = {
+        "raw_tokens": raw_tokens,
+        "packed_tokens": estimate_tokens(context),
+        "chunks_in": len(hits),
+        "chunks_out": len(selected),
+    }
+    stats["tokens_saved"] = stats["raw_tokens"] - stats["packed_tokens"]
+    logger.info(
+        "context packed %d -> %d chunks, %d -> %d tokens (saved %d)",
+        stats["chunks_in"], stats["chunks_out"],
+        stats["raw_tokens"], stats["packed_tokens"], stats["tokens_saved"]
+    )
+    return context, stats
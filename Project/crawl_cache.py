@@ -0,0 +1,132 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = "crawl_cache.sqlite3"
+
+
+def normalize(value):
+    # Whitespace-only edits on the site are not content changes
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items() if k not in ("url", "fetch_tier")}
+    return value
+
+
+def content_hash(value):
+    raw = json.dumps(normalize(value), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def section_changes(old, new):
+    # Section titles whose content was added, changed or removed between two records
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return []
+    old_sections = {s.get("title") or "": content_hash(s.get("content", "")) for s in old.get("sections", [])}
+    new_sections = {s.get("title") or "": content_hash(s.get("content", "")) for s in new.get("sections", [])}
+    return sorted(
+        title for title in set(old_sections) | set(new_sections)
+        if old_sections.get(title) != new_sections.get(title)
+    )
+
+
+# =========================
+# PERSISTENT PAGE CACHE
+# =========================
+class CrawlCache:
+    # One row per crawl job, keyed by (family, kind, url): the same URL can be
+    # fetched by two jobs (/modular-courses is both the course_list page and
+    # the courses discovery page) and each needs its own result and validators.
+    # fetch_tier records how the result was obtained: only an "http" result
+    # can be revalidated by a 304, since a browser-rendered page may change
+    # behind an unchanged HTML shell
+    def __init__(self, path=CACHE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+        if columns and "kind" not in columns:
+            # Caches keyed by URL alone are rebuilt on the next crawl
+            self._conn.execute("DROP TABLE pages")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                family TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                fetch_tier TEXT,
+                PRIMARY KEY (family, kind, url)
+            )
+        """)
+        if columns and "kind" in columns and "fetch_tier" not in columns:
+            # Rows of unknown tier are never revalidated, only refetched
+            self._conn.execute("ALTER TABLE pages ADD COLUMN fetch_tier TEXT")
+        self._conn.commit()
+
+    def get(self, family, kind, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, result, fetch_tier FROM pages "
+                "WHERE family = ? AND kind = ? AND url = ?",
+                (family, kind, url)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "etag": row[0], "last_modified": row[1], "content_hash": row[2],
+            "result": json.loads(row[3]), "fetch_tier": row[4],
+        }
+
+    def validators(self, family, kind, url):
+        # Headers for a conditional GET, empty if we have never seen the page
+        # or its result did not come from plain HTTP
+        entry = self.get(family, kind, url)
+        headers = {}
+        if entry is None or entry["fetch_tier"] != "http":
+            return headers
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, family, kind, url, result, etag=None, last_modified=None, fetch_tier="http"):
+        # Returns (status, changed section titles); status is added/changed/unchanged
+        old = self.get(family, kind, url)
+        digest = content_hash(result)
+        if old is None:
+            status, sections = "added", []
+        elif old["content_hash"] == digest:
+            status, sections = "unchanged", []
+        else:
+            status, sections = "changed", section_changes(old["result"], result)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (family, kind, url, etag, last_modified, content_hash, "
+                "result, fetched_at, fetch_tier) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (family, kind, url, etag or (old or {}).get("etag"),
+                 last_modified or (old or {}).get("last_modified"),
+                 digest, json.dumps(result, ensure_ascii=False), time.time(), fetch_tier)
+            )
+            self._conn.commit()
+        return status, sections
+
+    def urls(self, family):
+        with self._lock:
+            return sorted({row[0] for row in self._conn.execute("SELECT url FROM pages WHERE family = ?", (family,))})
+
+    def remove(self, family, urls):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM pages WHERE family = ? AND url = ?", [(family, url) for url in urls]
+            )
+            self._conn.commit()
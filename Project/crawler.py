@@ -0,0 +1,676 @@
+import argparse
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from selenium import webdriver
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+
+import crawl_cache
+import http_fetch
+import readiness
+
+# Usage (from the Project folder):
+#   python crawler.py                       # refresh the JSONL corpus in pdfs/
+#   python crawler.py --pdf                 # ... plus the PDF exports
+#   python crawler.py --only courses -w 6
+#   python crawler.py --base-url http://127.0.0.1:8000   # local fixtures
+
+BASE_URL = "https://sunbeaminfo.in"
+WORKERS = 4
+PAGE_TIMEOUT = 30
+RETRIES = 2
+# "bulk": one execute_script per page; "elements": one WebDriver call per element
+EXTRACT_MODE = "bulk"
+# "auto": plain HTTP first, browser only if expected selectors are missing
+FETCH_MODE = "auto"
+REPORT_PATH = "crawl_report.json"
+
+# family -> (output file name, PDF title); the JSONL corpus uses the same stem
+OUTPUTS = {
+    "about": ("Sunbeam_Information.pdf", "About Sunbeam"),
+    "course_list": ("modular_courses_list.pdf", "Sunbeam Modular Courses List"),
+    "courses": ("Sunbeam_Modular_Courses_COMPLETE_INFO.pdf", "Sunbeam Modular Courses – Full Course Information"),
+    "internship": ("Sunbeam_Internship_Complete_Full_Data.pdf", "Sunbeam Internship – Complete Details"),
+}
+
+ABOUT_PAGES = [
+    ("About Sunbeam", "/about-us.php"),
+    ("Sunbeam Branches", "/sunbeam-branches-home"),
+    ("Sunbeam Branch Details – ID 1", "/branch-details.php?bdid=1"),
+    ("Sunbeam Branch Details – ID 5", "/branch-details.php?bdid=5"),
+]
+COURSE_LIST_PAGES = ["/modular-courses-home", "/modular-courses"]
+INTERNSHIP_PAGE = "/internship"
+
+
+def clean_text(text):
+    # reportlab's base fonts can't render most non-ASCII glyphs
+    return re.sub(r'[^\x00-\x7F]+', ' ', text).strip()
+
+
+def meaningful_text(body_text):
+    # Keep only meaningful lines
+    filtered = [
+        line.strip() for line in body_text.split("\n")
+        if len(line.strip()) > 40
+    ]
+    return "\n\n".join(filtered)
+
+
+# =========================
+# DRIVER POOL
+# =========================
+_driver_path = {}
+
+
+def chrome_service():
+    # ChromeDriverManager().install() used to run once per script; now once per process
+    if "path" not in _driver_path:
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+            _driver_path["path"] = ChromeDriverManager().install()
+        except ImportError:
+            # Selenium >= 4.6 resolves a matching driver by itself
+            _driver_path["path"] = None
+    return Service(_driver_path["path"]) if _driver_path["path"] else Service()
+
+
+def make_driver(headless=True):
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"user-agent={http_fetch.USER_AGENT}")
+    # driver.get returns at DOMContentLoaded; readiness.py decides when content is there
+    options.page_load_strategy = "eager"
+
+    driver = webdriver.Chrome(service=chrome_service(), options=options)
+    driver.set_page_load_timeout(PAGE_TIMEOUT)
+    return driver
+
+
+class DriverPool:
+    # At most `size` headless Chromes, created on demand and reused by all jobs
+    def __init__(self, size=WORKERS, headless=True):
+        self.size = size
+        self.headless = headless
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._all = []
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if not create:
+            return self._idle.get()
+        try:
+            driver = make_driver(self.headless)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._all.append(driver)
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._created -= 1
+            if driver in self._all:
+                self._all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def driver(self):
+        driver = self._acquire()
+        try:
+            yield driver
+        except TimeoutException:
+            # A readiness wait ran out (a TimeoutException is a
+            # WebDriverException too): the page was slow, the browser is fine
+            self._idle.put(driver)
+            raise
+        except WebDriverException:
+            # A crashed or wedged browser is replaced rather than reused
+            self._discard(driver)
+            raise
+        except Exception:
+            self._idle.put(driver)
+            raise
+        else:
+            self._idle.put(driver)
+
+    def close(self):
+        with self._lock:
+            drivers, self._all = self._all, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+# =========================
+# BULK EXTRACTION (ONE ROUND-TRIP)
+# =========================
+# Reads the page text, force-opens every accordion (no click/animation) and
+# returns title, overview and all panels as one JSON payload, so the cost of
+# a page no longer grows with its number of panels.
+EXTRACT_JS = """
+const bodySelector = arguments[0];
+const text = el => el ? el.innerText.trim() : "";
+const pageText = document.body.innerText;
+const panels = Array.from(document.querySelectorAll(".panel.panel-default"));
+panels.forEach(panel => panel.querySelectorAll(".panel-collapse").forEach(el => {
+    el.classList.remove("collapsing");
+    el.classList.add("in");
+    el.style.display = "block";
+    el.style.height = "auto";
+}));
+return {
+    title: text(document.querySelector("h1")),
+    overview: text(document.querySelector("section")),
+    body: pageText,
+    panels: panels.map(panel => ({
+        heading: text(panel.querySelector("h4")),
+        body: text(panel.querySelector(bodySelector))
+    }))
+};
+"""
+
+
+def extract_page(driver, body_selector):
+    return driver.execute_script(EXTRACT_JS, body_selector)
+
+
+def course_record(page):
+    sections = []
+    overview = clean_text(page["overview"])
+    if overview:
+        sections.append({"title": "Course Overview", "content": overview})
+    for panel in page["panels"]:
+        content = clean_text(panel["body"])
+        if content:
+            sections.append({"title": panel["heading"], "content": content})
+    return {"title": page["title"], "sections": sections}
+
+
+def internship_record(page):
+    sections = [{"title": "Full Page Content", "content": clean_text(page["body"])}]
+    for panel in page["panels"]:
+        sections.append({
+            "title": f"{panel['heading']} (Accordion Box)",
+            "content": clean_text(panel["body"]),
+        })
+    return {"title": page["title"] or "Sunbeam Internship Program", "sections": sections}
+
+
+# =========================
+# PAGE EXTRACTORS
+# =========================
+def scrape_page_text(driver, url, ready):
+    driver.get(url)
+    ready.until("document", readiness.document_ready())
+    return meaningful_text(driver.find_element(By.TAG_NAME, "body").text)
+
+
+def discover_course_urls(driver, url, ready):
+    driver.get(url)
+    # Course cards may be injected after DOMContentLoaded
+    if not ready.optional("course_links", readiness.present("a[href*='/modular-courses/']")):
+        ready.until("document", readiness.document_ready())
+    urls = driver.execute_script("""
+        return Array.from(document.querySelectorAll("a"))
+            .filter(a => a.href && a.href.includes("/modular-courses/"))
+            .map(a => a.href);
+    """)
+    return list(dict.fromkeys(urls))
+
+
+def scrape_course(driver, url, ready, extract=EXTRACT_MODE):
+    driver.get(url)
+    ready.until("heading", readiness.present("h1"))
+    ready.optional("panels", readiness.present(".panel.panel-default .panel-body"))
+
+    if extract == "bulk":
+        try:
+            return course_record(extract_page(driver, ".panel-body"))
+        except JavascriptException as e:
+            print(f"⚠️ Bulk extraction failed, falling back to elements: {url} ({e.msg})")
+
+    title = driver.find_element(By.TAG_NAME, "h1").text.strip()
+    sections = []
+
+    # ========= TOP PAGE CONTENT =========
+    try:
+        top_section = driver.find_element(By.CSS_SELECTOR, "section")
+        top_text = clean_text(driver.execute_script("return arguments[0].innerText;", top_section))
+        if top_text:
+            sections.append({"title": "Course Overview", "content": top_text})
+    except WebDriverException:
+        pass
+
+    # ========= SYLLABUS / OTHER PANELS =========
+    for panel in driver.find_elements(By.CSS_SELECTOR, ".panel.panel-default"):
+        try:
+            sec_title = panel.find_element(By.CSS_SELECTOR, "h4").text.strip()
+            body = panel.find_element(By.CSS_SELECTOR, ".panel-body")
+            content = clean_text(driver.execute_script("return arguments[0].innerText;", body))
+            if content:
+                sections.append({"title": sec_title, "content": content})
+        except WebDriverException:
+            continue
+
+    return {"title": title, "sections": sections}
+
+
+def scrape_internship(driver, url, ready, extract=EXTRACT_MODE):
+    driver.get(url)
+    ready.until("document", readiness.document_ready())
+    ready.optional("panels", readiness.present(".panel.panel-default"))
+    ready.optional("network_idle", readiness.network_idle())
+
+    if extract == "bulk":
+        try:
+            return internship_record(extract_page(driver, ".panel-collapse"))
+        except JavascriptException as e:
+            print(f"⚠️ Bulk extraction failed, falling back to elements: {url} ({e.msg})")
+
+    try:
+        title = driver.find_element(By.TAG_NAME, "h1").text.strip()
+    except WebDriverException:
+        title = "Sunbeam Internship Program"
+
+    sections = [{
+        "title": "Full Page Content",
+        "content": clean_text(driver.find_element(By.TAG_NAME, "body").text),
+    }]
+
+    # ========= ACCORDION BOXES =========
+    for panel in driver.find_elements(By.CSS_SELECTOR, ".panel.panel-default"):
+        try:
+            title_el = panel.find_element(By.CSS_SELECTOR, "h4.panel-title a")
+            box_title = title_el.text.strip()
+
+            driver.execute_script("arguments[0].click();", title_el)
+            # Move on as soon as this panel has finished expanding
+            ready.optional("panel_expanded", readiness.expanded(panel))
+
+            content = clean_text(panel.find_element(By.CSS_SELECTOR, ".panel-collapse").text)
+            sections.append({"title": f"{box_title} (Accordion Box)", "content": content})
+        except WebDriverException as e:
+            print("❌ Error scraping a box", e)
+
+    return {"title": title, "sections": sections}
+
+
+# =========================
+# HTTP TIER
+# =========================
+def fetch_http(job, pool_size=WORKERS, cache=None):
+    # Returns (result, validators). result is the job result from a plain
+    # HTTP fetch, the cached result on 304 Not Modified, or None when the
+    # page is missing its expected selectors (or HTTP fails) and needs a browser
+    if not http_fetch.AVAILABLE or job["kind"] not in http_fetch.EXPECTED:
+        return None, {}
+    key = (job["family"], job["kind"], job["url"])
+    try:
+        headers = cache.validators(*key) if cache else None
+        html, validators = http_fetch.get_html(job["url"], pool_size, headers)
+        entry = cache.get(*key) if html is None and cache else None
+        if html is None and (entry is None or entry["fetch_tier"] != "http"):
+            # 304 but nothing cached for this job (removed meanwhile), or a
+            # record the browser rendered: fetch it in full
+            entry = None
+            html, validators = http_fetch.get_html(job["url"], pool_size)
+    except http_fetch.requests.RequestException:
+        return None, {}
+    if html is None:
+        if entry is None:
+            return None, {}
+        validators["not_modified"] = True
+        return entry["result"], validators
+
+    body_selector = ".panel-collapse" if job["kind"] == "internship" else ".panel-body"
+    payload, soup = http_fetch.parse_page(html, body_selector)
+    if not http_fetch.has_expected(soup, job["kind"]):
+        return None, validators
+
+    if job["kind"] == "discover":
+        return http_fetch.discover_links(soup, job["url"]), validators
+    if job["kind"] == "course":
+        return course_record(payload), validators
+    if job["kind"] == "internship":
+        return internship_record(payload), validators
+    return {"title": job["title"], "sections": [{"title": None, "content": meaningful_text(payload["body"])}]}, validators
+
+
+# =========================
+# JOBS
+# =========================
+def initial_jobs(base_url, families):
+    jobs = []
+    if "about" in families:
+        for title, path in ABOUT_PAGES:
+            jobs.append({"kind": "page_text", "family": "about", "url": base_url + path, "title": title})
+    if "course_list" in families:
+        jobs.append({
+            "kind": "page_text", "family": "course_list",
+            "url": base_url + COURSE_LIST_PAGES[1], "title": "Modular Courses"
+        })
+    if "courses" in families:
+        for path in COURSE_LIST_PAGES:
+            jobs.append({"kind": "discover", "family": "courses", "url": base_url + path})
+    if "internship" in families:
+        jobs.append({"kind": "internship", "family": "internship", "url": base_url + INTERNSHIP_PAGE})
+    for order, job in enumerate(jobs):
+        job["order"] = (order,)
+    return jobs
+
+
+def run_job(pool, job, extract=EXTRACT_MODE, fetch=FETCH_MODE, retries=RETRIES, cache=None):
+    # Returns (result, seconds, seconds spent waiting for readiness, tier,
+    # (change status, changed sections)); each browser attempt may land on
+    # a different browser, and waits twice as long for the page as the last
+    start = time.perf_counter()
+    validators = {}
+    if fetch == "auto":
+        result, validators = fetch_http(job, pool.size, cache)
+        if result is not None:
+            tier = "not_modified" if validators.get("not_modified") else "http"
+            return result, time.perf_counter() - start, 0.0, tier, record_change(cache, job, result, validators, "http")
+
+    waited = 0.0
+    for attempt in range(retries + 1):
+        try:
+            with pool.driver() as driver:
+                ready = readiness.Readiness(driver, attempt=attempt)
+                try:
+                    if job["kind"] == "discover":
+                        result = discover_course_urls(driver, job["url"], ready)
+                    elif job["kind"] == "course":
+                        result = scrape_course(driver, job["url"], ready, extract)
+                    elif job["kind"] == "internship":
+                        result = scrape_internship(driver, job["url"], ready, extract)
+                    else:
+                        text = scrape_page_text(driver, job["url"], ready)
+                        result = {"title": job["title"], "sections": [{"title": None, "content": text}]}
+                finally:
+                    waited += ready.waited
+            seconds = time.perf_counter() - start
+            return result, seconds, waited, "browser", record_change(cache, job, result, validators, "browser")
+        except WebDriverException:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def record_change(cache, job, result, validators, tier):
+    if cache is None:
+        return "added", []
+    if validators.get("not_modified"):
+        return "unchanged", []
+    return cache.update(
+        job["family"], job["kind"], job["url"], result,
+        etag=validators.get("etag"), last_modified=validators.get("last_modified"), fetch_tier=tier
+    )
+
+
+def same_site(url, base_url):
+    host = urlparse(url).netloc.lower().removeprefix("www.")
+    return host == urlparse(base_url).netloc.lower().removeprefix("www.")
+
+
+def crawl(base_url=BASE_URL, families=tuple(OUTPUTS), workers=WORKERS, headless=True,
+          extract=EXTRACT_MODE, fetch=FETCH_MODE, cache=None, on_record=None):
+    # Returns ({family: [record, ...]} in a stable page order, failed urls,
+    # {url: "http" | "not_modified" | "browser" | "cached"}, {family: change
+    # summary}). A failed page falls back to its cached record ("cached").
+    # Browsers only start if a page needs one. on_record(record) is called as
+    # each added or changed page finishes (e.g. PdfRenderer.submit), in
+    # completion order; unchanged pages are not handed over.
+    pool = DriverPool(workers, headless=headless)
+    records, seen_courses, failures, tiers = [], set(), [], {}
+    changes = {family: {"added": [], "changed": [], "removed": [], "unchanged": 0, "failed": []} for family in families}
+    failed_families = set()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {
+                executor.submit(run_job, pool, job, extract, fetch, RETRIES, cache): job
+                for job in initial_jobs(base_url, families)
+            }
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    try:
+                        result, seconds, waited, tier, (status, sections) = future.result()
+                    except Exception as e:
+                        print(f"❌ Failed after retries: {job['url']} ({e.__class__.__name__})")
+                        failures.append(job["url"])
+                        entry = cache.get(job["family"], job["kind"], job["url"]) if cache else None
+                        if entry is None:
+                            failed_families.add(job["family"])
+                            changes[job["family"]]["failed"].append(job["url"])
+                            continue
+                        # The last good copy stands in, so the family is still written in full
+                        result, seconds, waited = entry["result"], 0.0, 0.0
+                        tier, status, sections = "cached", "unchanged", []
+
+                    tiers[job["url"]] = tier
+                    print(f"✔ {job['kind']} [{tier}, {status}]: {job['url']} ({seconds:.1f}s, {waited:.1f}s waiting)")
+
+                    if job["kind"] == "discover":
+                        # Course pages fan out across the pool as soon as they are found
+                        for i, url in enumerate(result):
+                            if url in seen_courses or not same_site(url, base_url):
+                                continue
+                            seen_courses.add(url)
+                            course_job = {
+                                "kind": "course", "family": "courses",
+                                "url": url, "order": job["order"] + (i,)
+                            }
+                            pending[executor.submit(
+                                run_job, pool, course_job, extract, fetch, RETRIES, cache
+                            )] = course_job
+                    else:
+                        result["url"] = job["url"]
+                        result["fetch_tier"] = tier
+                        records.append((job["order"], job["family"], result))
+                        summary = changes[job["family"]]
+                        if status == "unchanged":
+                            summary["unchanged"] += 1
+                            continue
+                        if status == "added":
+                            summary["added"].append({"url": job["url"], "title": result["title"]})
+                        else:
+                            summary["changed"].append({"url": job["url"], "title": result["title"], "sections": sections})
+                        if on_record is not None:
+                            on_record(result)
+    finally:
+        pool.close()
+
+    if cache is not None:
+        # A page that failed may just be flaky; only a clean family can prove removals
+        for family in families:
+            if family in failed_families:
+                # Its files are not rewritten (see write_outputs), so what changed
+                # in it is forgotten and found again by the next crawl
+                summary = changes[family]
+                cache.remove(family, [page["url"] for page in summary["added"] + summary["changed"]])
+                continue
+            removed = [url for url in cache.urls(family) if url not in tiers]
+            cache.remove(family, removed)
+            changes[family]["removed"] = removed
+
+    by_family = {family: [] for family in families}
+    for _, family, record in sorted(records, key=lambda item: item[0]):
+        by_family[family].append(record)
+    return by_family, failures, tiers, changes
+
+
+def family_changed(summary):
+    return bool(summary["added"] or summary["changed"] or summary["removed"])
+
+
+def family_complete(summary):
+    # False when a page failed with no cached copy to stand in for it
+    return not summary.get("failed")
+
+
+def corpus_lines(family, records):
+    # One knowledge record per (page/course, section), in page order
+    for record in records:
+        for sec in record["sections"]:
+            if sec["content"].strip():
+                yield {
+                    "family": family,
+                    "course": record["title"],
+                    "section": sec.get("title"),
+                    "content": sec["content"],
+                    "source_url": record.get("url"),
+                }
+
+
+def write_jsonl(path, family, records):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for line in corpus_lines(family, records):
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_outputs(by_family, out_dir, changes=None, pdf=False, renderer=None):
+    # The JSONL corpus is what ingest.py reads; the PDF is an optional export,
+    # merged from parts a PdfRenderer laid out during the crawl if given.
+    # Families whose pages all came back unchanged keep their existing files,
+    # so ingest.py sees the same file hash and skips re-embedding them too;
+    # so do families with a failed page that had no cached copy
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for family, records in by_family.items():
+        if not records:
+            continue
+        file_name, title = OUTPUTS[family]
+        stem = os.path.join(out_dir, os.path.splitext(file_name)[0])
+        targets = [(stem + ".jsonl", write_jsonl, family)]
+        if pdf:
+            import pdf_export  # reportlab is only needed for the optional export
+            targets.append((stem + ".pdf", renderer.write if renderer else pdf_export.write_pdf, title))
+        for path, write, label in targets:
+            # Rewriting a family that lost a page would drop it from the corpus
+            if changes is not None and os.path.exists(path) and (
+                not family_changed(changes[family]) or not family_complete(changes[family])
+            ):
+                continue
+            written.append(write(path, label, records))
+    return written
+
+
+def tier_counts(tiers):
+    return {tier: sum(1 for t in tiers.values() if t == tier) for tier in ("http", "not_modified", "browser", "cached")}
+
+
+def write_report(path, changes, failures, tiers, written):
+    report = {
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "families": changes,
+        "written": written,
+        "failures": failures,
+        "tiers": tier_counts(tiers),
+        # Which tier each URL needed, e.g. to spot pages that fell back to Chrome
+        "tier_by_url": dict(sorted(tiers.items())),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape sunbeaminfo.in into the knowledge-base corpus")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--only", nargs="+", choices=sorted(OUTPUTS), default=sorted(OUTPUTS))
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS)
+    parser.add_argument("--out", default="pdfs")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a window (debugging)")
+    parser.add_argument("--extract", choices=["bulk", "elements"], default=EXTRACT_MODE,
+                        help="bulk: one JavaScript round-trip per page")
+    parser.add_argument("--fetch", choices=["auto", "browser"], default=FETCH_MODE,
+                        help="auto: plain HTTP first, browser only when needed")
+    parser.add_argument("--pdf", action="store_true", help="Also export each family as a PDF")
+    parser.add_argument("--pdf-workers", type=int, default=None,
+                        help="Processes laying out PDF pages during the crawl (0: one pass at the end)")
+    parser.add_argument("--cache", default=crawl_cache.CACHE_PATH,
+                        help="Page cache (ETag / Last-Modified / content hash per URL)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-extract and rewrite every PDF")
+    parser.add_argument("--report", default=REPORT_PATH, help="Where to write the change report")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    cache = None if args.no_cache else crawl_cache.CrawlCache(args.cache)
+    renderer = None
+    if args.pdf and args.pdf_workers != 0:
+        import pdf_export
+        renderer = pdf_export.PdfRenderer(args.pdf_workers or pdf_export.RENDER_WORKERS)
+    try:
+        by_family, failures, tiers, changes = crawl(
+            args.base_url.rstrip("/"), args.only, args.workers,
+            headless=not args.show_browser, extract=args.extract, fetch=args.fetch, cache=cache,
+            on_record=renderer.submit if renderer else None
+        )
+        # Without a cache every page counts as added, so every complete family is rewritten
+        written = write_outputs(by_family, args.out, changes, pdf=args.pdf, renderer=renderer)
+    finally:
+        if renderer is not None:
+            renderer.close()
+    for path in written:
+        print(f"✅ Written: {path}")
+
+    for family, summary in changes.items():
+        if not family_complete(summary):
+            print(f"   {family}: {len(summary['failed'])} page(s) failed with no cached copy, files kept")
+            continue
+        if cache and not family_changed(summary):
+            print(f"   {family}: unchanged ({summary['unchanged']} page(s)), files kept")
+            continue
+        print(f"   {family}: {len(summary['added'])} added, {len(summary['changed'])} changed, "
+              f"{len(summary['removed'])} removed, {summary['unchanged']} unchanged")
+        for page in summary["changed"]:
+            print(f"     ~ {page['title']}: {', '.join(s or '(untitled)' for s in page['sections']) or 'title'}")
+    write_report(args.report, changes, failures, tiers, written)
+
+    counts = tier_counts(tiers)
+    print(f"   Fetch tiers: {counts['http']} via HTTP, {counts['not_modified']} not modified, "
+          f"{counts['browser']} via browser")
+    print(f"🔥 Crawl finished in {time.perf_counter() - start:.1f}s with {len(failures)} failed page(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
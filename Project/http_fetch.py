@@ -0,0 +1,141 @@
+import re
+import threading
+from urllib.parse import urljoin
+
+# Optional tier: without requests + beautifulsoup4 installed every page
+# simply goes to the browser, exactly as before.
+try:
+    import requests
+    from bs4 import BeautifulSoup, NavigableString, Tag
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    AVAILABLE = True
+except ImportError:
+    AVAILABLE = False
+
+TIMEOUT = 15
+# Sent by both tiers, so the site sees the same client from Chrome and requests
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
+)
+
+# Selectors a server-rendered page must contain for the HTTP result to be
+# trusted; anything missing means the content is built by JavaScript.
+EXPECTED = {
+    "page_text": ["h1"],
+    "discover": ["a[href*='/modular-courses/']"],
+    "course": ["h1", ".panel.panel-default"],
+    "internship": ["h1", ".panel.panel-default"],
+}
+
+
+# =========================
+# POOLED CLIENT
+# =========================
+_session = {}
+_lock = threading.Lock()
+
+
+def get_session(pool_size=10):
+    with _lock:
+        if "session" not in _session:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session["session"] = session
+        return _session["session"]
+
+
+def get_html(url, pool_size=10, headers=None):
+    # Returns (html, validators); html is None on 304 Not Modified when
+    # conditional headers (If-None-Match / If-Modified-Since) were sent
+    response = get_session(pool_size).get(url, headers=headers, timeout=TIMEOUT)
+    response.raise_for_status()
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    if response.status_code == 304:
+        return None, validators
+    return response.text, validators
+
+
+# =========================
+# HTML -> SAME PAYLOAD AS THE BROWSER'S BULK EXTRACTION
+# =========================
+# Elements a browser's innerText puts on their own line; everything else
+# (b, a, span, em, ...) flows inline with the text around it
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "details", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5",
+    "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "summary",
+    "table", "tbody", "thead", "tfoot", "tr", "ul",
+}
+CELL_TAGS = {"td", "th"}
+
+
+def _inner_text(el, parts):
+    for child in el.children:
+        if isinstance(child, Tag):
+            if child.name == "br":
+                parts.append("\n")
+            elif child.name in BLOCK_TAGS:
+                parts.append("\n")
+                _inner_text(child, parts)
+                parts.append("\n")
+            else:
+                _inner_text(child, parts)
+                if child.name in CELL_TAGS:
+                    parts.append(" ")
+        elif type(child) is NavigableString:  # not comments, doctypes, CDATA
+            parts.append(re.sub(r"\s+", " ", str(child)))
+
+
+def _text(el):
+    # innerText semantics: a line per block element, inline text joined by
+    # single spaces, no empty lines
+    if el is None:
+        return ""
+    parts = []
+    _inner_text(el, parts)
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def parse_page(html, body_selector):
+    soup = BeautifulSoup(html, "html.parser")
+    for el in soup(["script", "style", "noscript", "template"]):
+        el.decompose()
+
+    panels = soup.select(".panel.panel-default")
+    payload = {
+        "title": _text(soup.find("h1")),
+        "overview": _text(soup.find("section")),
+        "panels": [
+            {"heading": _text(panel.find("h4")), "body": _text(panel.select_one(body_selector))}
+            for panel in panels
+        ],
+    }
+
+    # A browser's innerText skips collapsed panels; match that for the page body
+    for el in soup.select(".panel-collapse"):
+        if "in" not in (el.get("class") or []):
+            el.decompose()
+    payload["body"] = _text(soup.body or soup)
+    return payload, soup
+
+
+def has_expected(soup, kind):
+    return all(soup.select_one(css) is not None for css in EXPECTED.get(kind, []))
+
+
+def discover_links(soup, base_url):
+    urls = [urljoin(base_url, a["href"]) for a in soup.select("a[href]") if "/modular-courses/" in a["href"]]
+    return list(dict.fromkeys(urls))
@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import socket
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+POINTER_NAME = "current_index.json"
+STATUS_NAME = "ingest_status.json"
+LOCK_NAME = "ingest.lock"
+VERSIONS_DIR = "versions"
+# The live version plus the one before it, which in-flight queries may still hold
+KEEP_VERSIONS = 2
+COPY_BATCH_SIZE = 256
+
+
+# =========================
+# HOST-WIDE SINGLE FLIGHT
+# =========================
+class FileLock:
+    # An OS advisory lock on a file: held by at most one process on the host,
+    # released by the OS if that process dies
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self, blocking=True):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise
+                        time.sleep(0.5)
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        else:
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+# =========================
+# SHARED STATE (ATOMIC JSON FILES)
+# =========================
+def read_json(path, default=None):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_status(db_path):
+    return read_json(os.path.join(db_path, STATUS_NAME), {"state": "idle"})
+
+
+def write_status(db_path, state, **fields):
+    write_json(os.path.join(db_path, STATUS_NAME), {
+        "state": state, "pid": os.getpid(), "host": socket.gethostname(),
+        "updated": time.time(), **fields,
+    })
+
+
+# =========================
+# VERSIONS
+# =========================
+# A version is {"name", "collection", "path"}: a collection (or compact
+# store) plus a folder holding its manifest and BM25 index. current_index.json
+# names the live version and is replaced atomically, so a reader sees the old
+# or the new version, never one being built.
+def legacy_version(db_path, collection_name):
+    # Stores built before versioning kept everything at the top level
+    return {"name": "legacy", "collection": collection_name, "path": db_path}
+
+
+def active_version(db_path):
+    return read_json(os.path.join(db_path, POINTER_NAME))
+
+
+def new_version(db_path, collection_name):
+    name = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    path = os.path.join(db_path, VERSIONS_DIR, name)
+    os.makedirs(path, exist_ok=True)
+    version = {"name": name, "collection": f"{collection_name}-{name}", "path": path}
+    # Lets garbage collection find the collection of a build that never finished
+    write_json(os.path.join(path, "version.json"), version)
+    return version
+
+
+def seed_version(source_collection, target_collection, files):
+    # Starts the new version as a copy of the live one (stored vectors, no
+    # embedding), so the build only embeds what changed
+    ids = source_collection.get(include=[])["ids"]
+    for start in range(0, len(ids), COPY_BATCH_SIZE):
+        batch = source_collection.get(
+            ids=ids[start:start + COPY_BATCH_SIZE], include=["documents", "metadatas", "embeddings"]
+        )
+        target_collection.add(
+            ids=batch["ids"], documents=batch["documents"],
+            metadatas=batch["metadatas"], embeddings=batch["embeddings"]
+        )
+    for source_path, target_path in files:
+        if os.path.exists(source_path):
+            shutil.copyfile(source_path, target_path)
+    return len(ids)
+
+
+def publish(db_path, version, previous):
+    version = dict(version, published=time.time())
+    write_json(os.path.join(db_path, POINTER_NAME), version)
+    # The pre-versioning store joins the history so it is collected too
+    history = read_json(os.path.join(db_path, VERSIONS_DIR, "history.json"), None) or [previous]
+    history.append(version)
+    write_json(os.path.join(db_path, VERSIONS_DIR, "history.json"), history)
+    return history
+
+
+def collect_garbage(db_path, drop_collection, keep=KEEP_VERSIONS):
+    # Drops every published version older than the newest `keep`, plus
+    # leftovers of builds that never got published
+    history_path = os.path.join(db_path, VERSIONS_DIR, "history.json")
+    history = read_json(history_path, [])
+    kept, dropped = history[-keep:], history[:-keep]
+    kept_names = {version["name"] for version in kept}
+
+    versions_dir = os.path.join(db_path, VERSIONS_DIR)
+    for name in os.listdir(versions_dir):
+        path = os.path.join(versions_dir, name)
+        if os.path.isdir(path) and name not in kept_names and all(v["name"] != name for v in dropped):
+            dropped.append(read_json(os.path.join(path, "version.json"), {"name": name, "collection": None, "path": path}))
+
+    for version in dropped:
+        if version.get("collection"):
+            drop_collection(version)
+        if version["path"] != db_path:
+            shutil.rmtree(version["path"], ignore_errors=True)
+    write_json(history_path, kept)
+    return [version["name"] for version in dropped]
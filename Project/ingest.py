@@ -0,0 +1,399 @@
+import hashlib
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from pypdf import PdfReader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import bm25
+import metrics
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
+MANIFEST_NAME = "ingest_manifest.json"
+# Bumped whenever chunk boundaries or chunk metadata change
+CHUNKING = "sections-v3"
+
+# pdf_export.py styles: Title/Heading1 are 18pt, Heading2 14pt, Normal 10pt
+COURSE_HEADING_SIZE = 16
+SECTION_HEADING_SIZE = 12
+INHERIT = "\x00inherit"
+
+# Corpus file stem -> doc_type metadata (the crawler's family names)
+DOC_TYPES = {
+    "Sunbeam_Information": "about",
+    "modular_courses_list": "course_list",
+    "Sunbeam_Modular_Courses_COMPLETE_INFO": "courses",
+    "Sunbeam_Internship_Complete_Full_Data": "internship",
+}
+
+# Pipeline tuning: PDF pages / JSONL records parsed per worker task,
+# chunks per embedding call
+PAGES_PER_TASK = 4
+RECORDS_PER_TASK = 64
+EMBED_BATCH_SIZE = 64
+
+
+# =========================
+# FINGERPRINTS
+# =========================
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source, page, content, metadata, seen):
+    # Same text can legitimately repeat on a page, so the n-th copy gets a
+    # suffix. The metadata is part of the id: a course or section renamed
+    # around unchanged text (or a moved URL) yields a new chunk, so the
+    # stored one never keeps the stale metadata
+    base = hashlib.sha256(
+        f"{source}\x00{page}\x00{content}\x00{json.dumps(metadata, sort_keys=True)}".encode("utf-8")
+    ).hexdigest()[:32]
+    seen[base] = seen.get(base, 0) + 1
+    return base if seen[base] == 1 else f"{base}-{seen[base]}"
+
+
+# =========================
+# MANIFEST
+# =========================
+def load_manifest(path, settings):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+
+    # A different splitter or embedding model invalidates every stored chunk
+    if not manifest or manifest.get("settings") != settings:
+        return {"settings": settings, "files": {}}, False
+    return manifest, True
+
+
+def manifest_settings(embed_model_name):
+    return {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "chunking": CHUNKING,
+        "embedding_model": embed_model_name,
+    }
+
+
+def is_up_to_date(pdf_folder, manifest_path, embed_model_name):
+    # True when the manifest already describes exactly the files in the
+    # folder (by hash) under the current settings; costs one hash per file
+    manifest, valid = load_manifest(manifest_path, manifest_settings(embed_model_name))
+    if not valid or not os.path.exists(pdf_folder):
+        return False
+    files = corpus_files(pdf_folder)
+    if sorted(manifest["files"]) != files:
+        return False
+    return all(
+        manifest["files"][file]["sha256"] == file_sha256(os.path.join(pdf_folder, file))
+        for file in files
+    )
+
+
+def corpus_version(manifest):
+    # Changes whenever any stored chunk (or the settings behind it) changes
+    digest = hashlib.sha256(json.dumps(manifest["settings"], sort_keys=True).encode("utf-8"))
+    for file in sorted(manifest["files"]):
+        digest.update(file.encode("utf-8"))
+        for cid in manifest["files"][file]["chunk_ids"]:
+            digest.update(cid.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def read_corpus_version(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("corpus_version", "")
+    except (OSError, ValueError):
+        return ""
+
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# =========================
+# CHUNKING (RUNS IN WORKERS)
+# =========================
+def make_splitter():
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+
+
+def page_paragraphs(page):
+    # [(font size, text)] per paragraph; pdf_export.py writes one Paragraph per
+    # line, and the fragments of a wrapped Paragraph share one text matrix origin
+    paragraphs = []
+
+    def visit(text, cm, tm, font_dict, font_size):
+        if not text:
+            return
+        size = round(font_size * abs(tm[3] or 1), 1)
+        key = (cm[4], cm[5], size)
+        if paragraphs and paragraphs[-1][0] == key:
+            paragraphs[-1][2].append(text)
+        else:
+            paragraphs.append((key, size, [text]))
+
+    page.extract_text(visitor_text=visit)
+    return [(size, "".join(parts).strip()) for _, size, parts in paragraphs]
+
+
+def split_segment(chunks, splitter, page, lines, extra):
+    for content in splitter.split_text("\n".join(lines)):
+        content = content.strip()
+        if content:
+            chunks.append((page, content, dict(extra)))
+
+
+def parse_page_range(path, start, end):
+    # Only parse + split happens here; embedding stays in the parent process.
+    # Headings (Heading1 = course, Heading2 = section) close the running
+    # segment, so no chunk spans two courses or two sections. Chunks before
+    # the first heading in this range carry INHERIT and get the headings the
+    # previous range ended on (see resolve_headings).
+    reader = PdfReader(path)
+    splitter = make_splitter()
+    doc_type = DOC_TYPES.get(os.path.splitext(os.path.basename(path))[0], "document")
+    extra = {"doc_type": doc_type, "course": INHERIT, "section": INHERIT}
+
+    chunks = []
+    for page in range(start, end):
+        lines, has_body = [], False
+        for size, text in page_paragraphs(reader.pages[page]):
+            if not text:
+                continue
+            if size >= SECTION_HEADING_SIZE:
+                # Back-to-back headings (PDF title, then course) stay one segment
+                if has_body:
+                    split_segment(chunks, splitter, page, lines, extra)
+                    lines, has_body = [], False
+                if size >= COURSE_HEADING_SIZE:
+                    extra["course"], extra["section"] = text, None
+                else:
+                    extra["section"] = text
+            else:
+                has_body = True
+            lines.append(text)
+        split_segment(chunks, splitter, page, lines, extra)
+    return chunks
+
+
+def parse_record_range(path, start, end):
+    # One JSONL line per (course, section) from crawler.py; a chunk never
+    # crosses a section. There is no "page": the line number shifts whenever
+    # a course or section is added above, so the chunk id is keyed on the
+    # record's url, course and section instead (they are in its metadata)
+    splitter = make_splitter()
+
+    chunks = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in islice(f, start, end):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            extra = {
+                "doc_type": record.get("family") or "document",
+                "course": record.get("course"),
+                "section": record.get("section"),
+                "url": record.get("source_url"),
+            }
+            split_segment(chunks, splitter, None, [record.get("content") or ""], extra)
+    return chunks
+
+
+def resolve_headings(extra, last):
+    # Chunks opening a worker task inherit the headings the previous task of
+    # the same file ended on; Chroma metadata can't hold None, so drop those
+    resolved = {key: last.get(key) if value == INHERIT else value for key, value in extra.items()}
+    for key in ("course", "section"):
+        last[key] = resolved.get(key)
+    return {key: value for key, value in resolved.items() if value is not None}
+
+
+def parse_range(path, start, end):
+    if path.lower().endswith(".jsonl"):
+        return parse_record_range(path, start, end)
+    return parse_page_range(path, start, end)
+
+
+def page_tasks(path, source):
+    if path.lower().endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            count = sum(1 for _ in f)
+        per_task = RECORDS_PER_TASK
+    else:
+        count = len(PdfReader(path).pages)
+        per_task = PAGES_PER_TASK
+    return [
+        (source, path, start, min(start + per_task, count))
+        for start in range(0, count, per_task)
+    ]
+
+
+def corpus_files(folder):
+    # A family crawled to JSONL replaces its PDF export of the same name
+    names = os.listdir(folder)
+    records = {os.path.splitext(name)[0] for name in names if name.lower().endswith(".jsonl")}
+    return sorted(
+        name for name in names
+        if name.lower().endswith(".jsonl")
+        or (name.lower().endswith(".pdf") and os.path.splitext(name)[0] not in records)
+    )
+
+
+def run_page_tasks(tasks, workers):
+    # Yields results in task order; at most 2 * workers tasks are in flight
+    # so parsed chunks never pile up faster than they are embedded
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield task, parse_range(*task[1:])
+        return
+
+    # Spawned, not forked: the parent already runs threads (the embedding
+    # model, Streamlit, the background ingest) and a forked child could
+    # inherit one of their locks mid-acquire
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        remaining = iter(tasks)
+        pending = deque(
+            (task, pool.submit(parse_range, *task[1:]))
+            for task in islice(remaining, 2 * workers)
+        )
+        while pending:
+            task, future = pending.popleft()
+            chunks = future.result()
+            nxt = next(remaining, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(parse_range, *nxt[1:])))
+            yield task, chunks
+
+
+# =========================
+# BATCHED EMBEDDING
+# =========================
+class EmbeddingBatcher:
+    def __init__(self, collection, embed_model, batch_size=EMBED_BATCH_SIZE, lexical_index=None):
+        self.collection = collection
+        self.embed_model = embed_model
+        self.lexical_index = lexical_index
+        self.batch_size = batch_size
+        self.documents, self.metadatas, self.ids = [], [], []
+        self.embedded = 0
+
+    def add(self, document, metadata, chunk_id):
+        self.documents.append(document)
+        self.metadatas.append(metadata)
+        self.ids.append(chunk_id)
+        if len(self.ids) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.ids:
+            return
+        with metrics.span("ingest.embed", chunks=len(self.ids)):
+            embeddings = self.embed_model.embed_documents(self.documents)
+        with metrics.span("ingest.upsert", chunks=len(self.ids)):
+            self.collection.upsert(
+                documents=self.documents,
+                metadatas=self.metadatas,
+                embeddings=embeddings,
+                ids=self.ids
+            )
+        if self.lexical_index is not None:
+            self.lexical_index.add(self.ids, self.documents)
+        self.embedded += len(self.ids)
+        self.documents, self.metadatas, self.ids = [], [], []
+
+
+# =========================
+# INCREMENTAL INGESTION
+# =========================
+def ingest_pdfs(collection, embed_model, pdf_folder="pdfs",
+                manifest_path=MANIFEST_NAME, embed_model_name="", workers=None,
+                bm25_path=None):
+    if not os.path.exists(pdf_folder):
+        return {"embedded": 0, "deleted": 0, "skipped_files": 0, "corpus_version": ""}
+
+    settings = manifest_settings(embed_model_name)
+    manifest, manifest_valid = load_manifest(manifest_path, settings)
+
+    existing = collection.get(include=[])
+    existing_ids = set(existing["ids"]) if existing and existing.get("ids") else set()
+
+    if not manifest_valid and existing_ids:
+        # Vectors from another model/splitter cannot be reused
+        collection.delete(ids=list(existing_ids))
+        existing_ids = set()
+
+    files, wanted_ids, tasks = {}, set(), []
+    skipped_files = 0
+
+    for file in corpus_files(pdf_folder):
+        path = os.path.join(pdf_folder, file)
+        digest = file_sha256(path)
+        entry = manifest["files"].get(file)
+
+        # Unchanged file whose chunks are all still stored: no parse, no embed
+        if entry and entry["sha256"] == digest and existing_ids.issuperset(entry["chunk_ids"]):
+            files[file] = entry
+            wanted_ids.update(entry["chunk_ids"])
+            skipped_files += 1
+            continue
+
+        files[file] = {"sha256": digest, "chunk_ids": []}
+        tasks.extend(page_tasks(path, file))
+
+    # Parse/split in a process pool, stream chunks into fixed-size embed batches
+    lexical_index = bm25.BM25Index.load(bm25_path) if bm25_path else None
+    batcher = EmbeddingBatcher(collection, embed_model, lexical_index=lexical_index)
+    seen, headings = {}, {}
+    for (file, _, _, _), chunks in run_page_tasks(tasks, workers or os.cpu_count() or 1):
+        for page, content, extra in chunks:
+            metadata = resolve_headings(extra, headings.setdefault(file, {}))
+            cid = chunk_id(file, page, content, metadata, seen.setdefault(file, {}))
+            files[file]["chunk_ids"].append(cid)
+            wanted_ids.add(cid)
+            if cid not in existing_ids:
+                position = {"page": page} if page is not None else {}
+                batcher.add(content, {"source": file, **position, **metadata}, cid)
+    batcher.flush()
+
+    # Chunks of edited or removed files (and legacy random ids) go by id
+    stale = existing_ids - wanted_ids
+    if stale:
+        with metrics.span("ingest.delete", chunks=len(stale)):
+            collection.delete(ids=list(stale))
+
+    # The BM25 index is built over exactly the same chunks as Chroma
+    if lexical_index is not None:
+        with metrics.span("ingest.bm25", chunks=len(wanted_ids)):
+            bm25.sync_index(lexical_index, collection, wanted_ids)
+            if lexical_index.dirty or not os.path.exists(bm25_path):
+                lexical_index.save(bm25_path)
+
+    manifest["files"] = files
+    manifest["corpus_version"] = corpus_version(manifest)
+    save_manifest(manifest_path, manifest)
+
+    return {
+        "embedded": batcher.embedded,
+        "deleted": len(stale),
+        "skipped_files": skipped_files,
+        "corpus_version": manifest["corpus_version"],
+    }
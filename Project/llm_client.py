@@ -0,0 +1,241 @@
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+
+FAKE_RESPONSE = os.getenv(
+    "SUNBEAM_FAKE_RESPONSE",
+    "The requested information is not available in the provided documents."
+)
+# Delay between streamed characters of the fake model, in seconds
+FAKE_TOKEN_DELAY = float(os.getenv("SUNBEAM_FAKE_TOKEN_DELAY", "0.01"))
+# Fault injection for the fake model: seconds before it answers, and the
+# share of calls failing with a 429/503
+FAKE_LATENCY = float(os.getenv("SUNBEAM_FAKE_LATENCY", "0"))
+FAKE_ERROR_RATE = float(os.getenv("SUNBEAM_FAKE_ERROR_RATE", "0"))
+
+# Per call: the answer (or first streamed token) must arrive within DEADLINE
+# seconds, retries and fallback included. FALLBACK_SHARE of it is reserved for
+# the fallback model. HEDGE_AFTER > 0 sends a second, racing request when the
+# first has not answered after that many seconds.
+DEADLINE = float(os.getenv("SUNBEAM_LLM_DEADLINE", "30"))
+FALLBACK_SHARE = 0.3
+HEDGE_AFTER = float(os.getenv("SUNBEAM_LLM_HEDGE_AFTER", "0"))
+RETRIES = int(os.getenv("SUNBEAM_LLM_RETRIES", "2"))
+RETRY_BASE = 0.5
+RETRY_CAP = 4.0
+
+
+# =========================
+# LOCAL FAKE MODEL
+# =========================
+def make_fake_llm(responses=None, token_delay=FAKE_TOKEN_DELAY, latency=FAKE_LATENCY,
+                  error_rate=FAKE_ERROR_RATE, errors=()):
+    # Streams its canned answers character by character, no network needed
+    if latency or error_rate or errors:
+        return FaultyFakeLLM(responses, token_delay, latency, error_rate, errors)
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    return FakeListChatModel(responses=responses or [FAKE_RESPONSE], sleep=token_delay)
+
+
+class FakeLLMError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"fake LLM error {status_code}")
+        self.status_code = status_code
+
+
+class FaultyFakeLLM:
+    # Same answers as the fake above, but waits `latency` seconds first (a
+    # number, or a callable drawing one per call) and then fails with the next
+    # status code in `errors` (None: succeed) or else with probability
+    # `error_rate`. Used to exercise ResilientLLM and the load tests.
+    def __init__(self, responses=None, token_delay=FAKE_TOKEN_DELAY, latency=0.0,
+                 error_rate=0.0, errors=(), seed=None):
+        self.responses = responses or [FAKE_RESPONSE]
+        self.token_delay = token_delay
+        self.latency = latency
+        self.error_rate = error_rate
+        self._errors = list(errors)
+        self._random = random.Random(seed)
+        self._calls = itertools.count()
+        self._lock = threading.Lock()
+
+    def _answer(self):
+        with self._lock:
+            call = next(self._calls)
+            if self._errors:
+                status = self._errors.pop(0)
+            else:
+                status = self._random.choice((429, 503)) if self._random.random() < self.error_rate else None
+            latency = self.latency() if callable(self.latency) else self.latency
+        time.sleep(latency)
+        if status is not None:
+            raise FakeLLMError(status)
+        return self.responses[call % len(self.responses)]
+
+    def invoke(self, prompt):
+        return self._answer()
+
+    def stream(self, prompt):
+        for char in self._answer():
+            time.sleep(self.token_delay)
+            yield char
+
+
+# =========================
+# DEADLINES, RETRIES, HEDGING, FALLBACK
+# =========================
+class LLMTimeout(TimeoutError):
+    pass
+
+
+def status_code(error):
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code
+
+
+def is_retryable(error):
+    # Rate limits, server errors and dropped connections; never a bad request
+    code = status_code(error)
+    if code is not None:
+        return code == 429 or code >= 500
+    return isinstance(error, (TimeoutError, ConnectionError)) or \
+        type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def backoff(attempt, base=RETRY_BASE, cap=RETRY_CAP):
+    # Full jitter, so users rate-limited together do not retry together
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _first_chunk(stream):
+    # Returns (first non-empty chunk or None, the rest of the stream)
+    stream = iter(stream)
+    for chunk in stream:
+        if _text(chunk):
+            return chunk, stream
+    return None, stream
+
+
+class ResilientLLM:
+    # Wraps the chat models from resources.get_llm() ([(name, model)], primary
+    # first) behind the same invoke/stream calls. Requests run on a thread
+    # pool so a stuck one can be abandoned at the deadline; an abandoned or
+    # losing hedged request finishes in the background and is ignored. Each
+    # model has its own pool of max_workers threads, so primary calls stuck
+    # until the SDK timeout never leave the fallback waiting for a thread.
+    # Every model gets an "llm.model.<name>" span with calls, errors,
+    # retries, hedges, timeouts and fallbacks counters (see metrics.py).
+    def __init__(self, models, deadline=DEADLINE, hedge_after=HEDGE_AFTER, retries=RETRIES,
+                 fallback_share=FALLBACK_SHARE, max_workers=32):
+        self.models = models
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.retries = retries
+        self.fallback_share = fallback_share
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"llm-{name}")
+            for name, _ in models
+        }
+
+    def _attempt(self, span, name, work, deadline):
+        executor = self._executors[name]
+        attempt = 0
+        while True:
+            span.count("calls")
+            pending, hedged, error = {executor.submit(work)}, False, None
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    span.count("timeouts")
+                    raise LLMTimeout(f"{name} did not answer within the deadline")
+                hedge = self.hedge_after > 0 and not hedged
+                done, pending = wait(
+                    pending, timeout=min(remaining, self.hedge_after) if hedge else remaining,
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    error = future.exception()
+                    span.count("errors")
+                if not done and hedge:
+                    # Slow rather than failed: race a second request
+                    pending.add(executor.submit(work))
+                    hedged = True
+                    span.count("hedges")
+                    span.count("calls")
+
+            if not is_retryable(error) or attempt >= self.retries:
+                raise error
+            pause = backoff(attempt)
+            if time.monotonic() + pause >= deadline:
+                span.count("timeouts")
+                raise LLMTimeout(f"{name} did not answer within the deadline") from error
+            attempt += 1
+            span.count("retries")
+            time.sleep(pause)
+
+    def _run(self, work):
+        # Primary first, then the fallback(s) with whatever time is left
+        deadline = time.monotonic() + self.deadline
+        for i, (name, model) in enumerate(self.models):
+            last = i == len(self.models) - 1
+            budget = deadline if last else deadline - self.fallback_share * self.deadline
+            counters = dict(calls=0, errors=0, retries=0, hedges=0, timeouts=0, fallbacks=0)
+            with metrics.span(f"llm.model.{name}", **counters) as span:
+                try:
+                    return self._attempt(span, name, lambda model=model: work(model), budget)
+                except Exception as e:
+                    if last or not (isinstance(e, LLMTimeout) or is_retryable(e)):
+                        raise
+                    span.count("fallbacks")
+
+    def invoke(self, prompt):
+        return self._run(lambda model: model.invoke(prompt))
+
+    def stream(self, prompt):
+        # The deadline covers the first token; once a model has started
+        # answering, the rest of its stream is passed through as it comes
+        first, rest = self._run(lambda model: _first_chunk(model.stream(prompt)))
+        if first is not None:
+            yield first
+        yield from rest
+
+
+# =========================
+# STREAMING + TIMING
+# =========================
+def _text(chunk):
+    content = getattr(chunk, "content", chunk)
+    return content if isinstance(content, str) else ""
+
+
+def stream_text(llm, prompt, timing):
+    # Yields text pieces as they arrive. timing["ttft"] is time to the first
+    # non-empty piece, timing["total"] is set once the stream is exhausted.
+    start = time.perf_counter()
+    timing["ttft"] = None
+    for chunk in llm.stream(prompt):
+        text = _text(chunk)
+        if not text:
+            continue
+        if timing["ttft"] is None:
+            timing["ttft"] = time.perf_counter() - start
+        yield text
+    timing["total"] = time.perf_counter() - start
+    if timing["ttft"] is None:
+        timing["ttft"] = timing["total"]
+
+
+def invoke_text(llm, prompt, timing):
+    start = time.perf_counter()
+    text = _text(llm.invoke(prompt))
+    timing["ttft"] = timing["total"] = time.perf_counter() - start
+    return text
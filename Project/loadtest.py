@@ -0,0 +1,271 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import benchmark
+import llm_client
+import rag
+import resources
+from cache import AnswerCache
+from chat_history import ChatHistory
+
+# Usage (from the Project folder):
+#   python loadtest.py --sessions 1 5 10 20 --duration 60 --output bench/load.json
+#   python loadtest.py --sessions 10 --think-time 0 --llm-median 0.8 --llm-error-rate 0.05
+#
+# Every simulated session runs in its own thread, as Streamlit runs each
+# browser session, and goes through the same calls as chatbot.py: RagService
+# (embedding, routing, search, packing), the LLM stream and the chat history.
+# The embedding model and vector store are the real ones; only the LLM is a
+# stub with a lognormal latency before its first token.
+
+STAGES = ("embed", "route", "search", "pack", "ttft", "llm", "history", "end_to_end")
+
+
+# =========================
+# CPU / RSS SAMPLING
+# =========================
+def rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource  # peak, not current, RSS; KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ResourceSampler:
+    # cpu_percent is process CPU time over wall time: 100 = one full core
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+    def _run(self):
+        start = last = time.perf_counter()
+        last_cpu = time.process_time()
+        while not self._stop.wait(self.interval):
+            now, cpu = time.perf_counter(), time.process_time()
+            self.samples.append({
+                "t": round(now - start, 2),
+                "cpu_percent": round(100 * (cpu - last_cpu) / (now - last), 1),
+                "rss_mb": round(rss_bytes() / 1e6, 1),
+                "threads": threading.active_count(),
+            })
+            last, last_cpu = now, cpu
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+# =========================
+# SIMULATED SESSIONS
+# =========================
+def stub_llm(args):
+    # Time to first token ~ lognormal(median, sigma); then token_delay per character
+    sampler = random.Random(args.seed)
+    lock = threading.Lock()
+
+    def latency():
+        with lock:
+            return sampler.lognormvariate(0, args.llm_sigma) * args.llm_median
+
+    return llm_client.ResilientLLM([("stub", llm_client.FaultyFakeLLM(
+        token_delay=args.llm_token_delay, latency=latency, error_rate=args.llm_error_rate, seed=args.seed
+    ))])
+
+
+def run_turn(service, history, chat_id, question, args):
+    start = time.perf_counter()
+    timing = {}
+    try:
+        answer = version = None
+        if args.answer_cache:
+            answer, version = service.cached_answer(question, args.language, chat=chat_id)
+        if answer is None:
+            prompt, _, _ = service.prepare_prompt_sync(question, args.language, timing, chat=chat_id)
+            llm_timing = {}
+            answer = "".join(service.stream_answer(prompt, llm_timing))
+            timing["ttft"], timing["llm"] = llm_timing["ttft"], llm_timing["total"]
+            if args.answer_cache:
+                service.store_answer(question, args.language, version, answer)
+
+        history_start = time.perf_counter()
+        history.add_turn(chat_id, question, answer, args.language)
+        timing["history"] = time.perf_counter() - history_start
+        error = None
+    except Exception as e:
+        error = type(e).__name__
+    timing["end_to_end"] = time.perf_counter() - start
+    return {"finished": time.perf_counter(), "timing": timing, "error": error}
+
+
+def session(index, service, history, questions, args, stop_at, turns):
+    rng = random.Random(f"{args.seed}-{index}")
+    chat_id = history.new_chat_id()
+    while True:
+        # Exponential think time: sessions drift apart instead of asking in lockstep
+        if args.think_time:
+            time.sleep(rng.expovariate(1 / args.think_time))
+        if time.perf_counter() >= stop_at:
+            return
+        turns.append(run_turn(service, history, chat_id, rng.choice(questions), args))
+
+
+def run_level(sessions, service, history, questions, args):
+    batches, queries = service.embedder.batches, service.embedder.queries
+    turns = []
+    sampler = ResourceSampler(args.sample_interval).start()
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    threads = [
+        threading.Thread(target=session, args=(i, service, history, questions, args, stop_at, turns),
+                         name=f"session-{i}", daemon=True)
+        for i in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Turns still running at stop_at finish before the clock stops
+    elapsed = time.perf_counter() - start
+    samples = sampler.stop()
+
+    ok = [turn for turn in turns if turn["error"] is None]
+    errors = {}
+    for turn in turns:
+        if turn["error"]:
+            errors[turn["error"]] = errors.get(turn["error"], 0) + 1
+    return {
+        "sessions": sessions,
+        "seconds": elapsed,
+        "turns": len(turns),
+        "errors": errors,
+        "throughput_per_s": len(ok) / elapsed if elapsed else None,
+        "latency_ms": {
+            stage: benchmark.summarize_ms([turn["timing"][stage] for turn in ok if stage in turn["timing"]])
+            for stage in STAGES
+        },
+        "embed_batches": service.embedder.batches - batches,
+        "embedded_queries": service.embedder.queries - queries,
+        "cpu_percent": {
+            "mean": sum(s["cpu_percent"] for s in samples) / len(samples) if samples else None,
+            "max": max((s["cpu_percent"] for s in samples), default=None),
+        },
+        "rss_mb": {"max": max((s["rss_mb"] for s in samples), default=None)},
+        "samples": samples,
+    }
+
+
+# =========================
+# RUN
+# =========================
+def run(args, scratch_dir):
+    resources.DB_PATH = args.db_path
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [item["question"] for item in json.load(f)["questions"]]
+
+    # A no-op when the store is already up to date
+    rag.ingest_pdfs(args.pdfs)
+    resources._resources["llm"] = stub_llm(args)
+    service = resources.get_rag_service()
+    if args.no_query_cache:
+        service.embedder.query_cache = None
+    history = ChatHistory(os.path.join(scratch_dir, "chat_history.sqlite3"))
+    # The stub's canned answers must never reach the real answer cache
+    resources._resources["answer_cache"] = AnswerCache(os.path.join(scratch_dir, "answer_cache.sqlite3"))
+
+    # Model load and first-query overheads are not part of the load test
+    service.prepare_prompt_sync("warm up", args.language)
+
+    levels = []
+    try:
+        for sessions in args.sessions:
+            level = run_level(sessions, service, history, questions, args)
+            levels.append(level)
+            e2e, ttft = level["latency_ms"]["end_to_end"], level["latency_ms"]["ttft"]
+            print(
+                f"✅ {sessions} session(s): {level['throughput_per_s']:.2f} answers/s · "
+                f"end-to-end p50 {e2e['p50'] or 0:.0f}ms p95 {e2e['p95'] or 0:.0f}ms p99 {e2e['p99'] or 0:.0f}ms · "
+                f"first token p95 {ttft['p95'] or 0:.0f}ms · CPU {level['cpu_percent']['mean'] or 0:.0f}% · "
+                f"RSS {level['rss_mb']['max'] or 0:.0f} MB · {sum(level['errors'].values())} error(s)"
+            )
+    finally:
+        service.close()
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "db_path": args.db_path,
+            "vector_store": resources.VECTOR_STORE,
+            "duration": args.duration,
+            "think_time": args.think_time,
+            "llm_median": args.llm_median,
+            "llm_sigma": args.llm_sigma,
+            "llm_token_delay": args.llm_token_delay,
+            "llm_error_rate": args.llm_error_rate,
+            "answer_cache": args.answer_cache,
+            "query_cache": not args.no_query_cache,
+            "questions": args.questions,
+            "seed": args.seed,
+        },
+        "host": {"python": platform.python_version(), "cpus": os.cpu_count()},
+        "levels": levels,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the question-answer path")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10],
+                        help="Concurrent sessions; several values run one level each")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per level")
+    parser.add_argument("--think-time", type=float, default=5.0, help="Mean pause between questions, seconds")
+    parser.add_argument("--questions", default="benchmarks/questions_v1.json")
+    parser.add_argument("--pdfs", default="pdfs")
+    parser.add_argument("--db-path", default=resources.DB_PATH)
+    parser.add_argument("--language", default="English")
+    parser.add_argument("--llm-median", type=float, default=0.8, help="Stub LLM median first-token latency, seconds")
+    parser.add_argument("--llm-sigma", type=float, default=0.5, help="Spread of the lognormal first-token latency")
+    parser.add_argument("--llm-token-delay", type=float, default=0.0, help="Stub LLM delay per character, seconds")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of stub LLM calls failing with 429/503")
+    parser.add_argument("--answer-cache", action="store_true", help="Serve repeated questions from the answer cache")
+    parser.add_argument("--no-query-cache", action="store_true", help="Embed every question, even repeated ones")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="CPU/RSS sampling period, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_results.json")
+    args = parser.parse_args(argv)
+
+    # Simulated chats and answers never land in the real chat history or answer cache
+    scratch_dir = tempfile.mkdtemp(prefix="sunbeam_load_")
+    try:
+        report = run(args, scratch_dir)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Set SUNBEAM_METRICS=0 to stop recording; spans still time themselves
+# (callers read span.seconds) but nothing is aggregated or exported.
+ENABLED = os.getenv("SUNBEAM_METRICS", "1") != "0"
+# Optional file that receives one JSON line per finished span
+JSONL_PATH = os.getenv("SUNBEAM_METRICS_JSONL")
+# Optional port for a plain-text Prometheus endpoint (GET /metrics)
+HTTP_PORT = os.getenv("SUNBEAM_METRICS_PORT")
+
+RECENT_SPANS = 200
+
+_lock = threading.Lock()
+_stages = {}
+_recent = deque(maxlen=RECENT_SPANS)
+
+
+# =========================
+# SPANS
+# =========================
+class Span:
+    __slots__ = ("name", "counters", "start", "seconds")
+
+    def __init__(self, name, counters):
+        self.name = name
+        self.counters = counters
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+
+    def count(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+
+@contextmanager
+def span(name, **counters):
+    # with metrics.span("embed_query", chunks=0) as s: ...; s.count("cache_hits")
+    s = Span(name, counters)
+    try:
+        yield s
+    finally:
+        s.seconds = time.perf_counter() - s.start
+        if ENABLED:
+            _record(s)
+
+
+def _record(s):
+    with _lock:
+        stage = _stages.setdefault(s.name, {"count": 0, "seconds": 0.0, "last": 0.0, "counters": {}})
+        stage["count"] += 1
+        stage["seconds"] += s.seconds
+        stage["last"] = s.seconds
+        for counter, value in s.counters.items():
+            stage["counters"][counter] = stage["counters"].get(counter, 0) + value
+        entry = {"ts": time.time(), "stage": s.name, "seconds": s.seconds, **s.counters}
+        _recent.append(entry)
+
+    if JSONL_PATH:
+        with open(JSONL_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+# =========================
+# READ / EXPORT
+# =========================
+def snapshot():
+    with _lock:
+        return {
+            name: {**stage, "counters": dict(stage["counters"])}
+            for name, stage in _stages.items()
+        }
+
+
+def recent_spans(limit=50):
+    with _lock:
+        return list(_recent)[-limit:]
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _recent.clear()
+
+
+def prometheus_text():
+    lines = [
+        "# HELP sunbeam_stage_seconds Time spent per pipeline stage.",
+        "# TYPE sunbeam_stage_seconds summary",
+    ]
+    stages = snapshot()
+    for name in sorted(stages):
+        stage = stages[name]
+        lines.append(f'sunbeam_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+        lines.append(f'sunbeam_stage_seconds_sum{{stage="{name}"}} {stage["seconds"]:.6f}')
+
+    counters = sorted({c for stage in stages.values() for c in stage["counters"]})
+    for counter in counters:
+        lines.append(f"# TYPE sunbeam_{counter}_total counter")
+        for name in sorted(stages):
+            if counter in stages[name]["counters"]:
+                lines.append(
+                    f'sunbeam_{counter}_total{{stage="{name}"}} {stages[name]["counters"][counter]}'
+                )
+    return "\n".join(lines) + "\n"
+
+
+def jsonl_text(limit=RECENT_SPANS):
+    return "".join(json.dumps(entry) + "\n" for entry in recent_spans(limit))
+
+
+# =========================
+# OPTIONAL HTTP ENDPOINT
+# =========================
+_server = None
+
+
+def start_http_server(port=None):
+    # Idempotent; Streamlit reruns may call this many times
+    global _server
+    port = port or HTTP_PORT
+    if not port or not ENABLED:
+        return None
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.jsonl"):
+                body, content_type = jsonl_text(), "application/x-ndjson"
+            elif self.path.startswith("/metrics"):
+                body, content_type = prometheus_text(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", int(port)), Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
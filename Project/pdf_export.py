@@ -0,0 +1,148 @@
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+
+# Consecutive lines are laid out as one paragraph (line breaks kept) instead
+# of a Paragraph + Spacer per line; capped so a block never gets costly to split
+MAX_BLOCK_LINES = 40
+RENDER_WORKERS = os.cpu_count() or 1
+
+
+# =========================
+# PDF LAYOUT
+# =========================
+# Every scraped family is written the same way:
+#   Title     -> the PDF title, alone on the first page
+#   Heading1  -> one per page/course record
+#   Heading2  -> one per section (omitted when the section has no title)
+#   Normal    -> one paragraph per block of non-empty lines of section content
+def blocks(content):
+    block = []
+    for line in content.split("\n"):
+        if line.strip():
+            block.append(escape(line.strip()))
+        if block and (not line.strip() or len(block) == MAX_BLOCK_LINES):
+            yield "<br/>".join(block)
+            block = []
+    if block:
+        yield "<br/>".join(block)
+
+
+def record_story(record, styles):
+    story = [Paragraph(escape(record["title"]), styles["Heading1"]), Spacer(1, 12)]
+
+    for sec in record["sections"]:
+        if sec.get("title"):
+            story.append(Paragraph(escape(sec["title"]), styles["Heading2"]))
+            story.append(Spacer(1, 6))
+
+        for block in blocks(sec["content"]):
+            story.append(Paragraph(block, styles["Normal"]))
+            story.append(Spacer(1, 4))
+
+    story.append(PageBreak())
+    return story
+
+
+def title_story(title, styles):
+    # A page of its own, so PdfRenderer can lay it out as a separate part
+    # and still produce the same pages as write_pdf
+    return [Paragraph(f"<b>{escape(title)}</b>", styles["Title"]), Spacer(1, 20), PageBreak()]
+
+
+def build_story(title, records, styles):
+    story = title_story(title, styles)
+    for record in records:
+        story.extend(record_story(record, styles))
+    return story
+
+
+def build_pdf(path, story):
+    doc = SimpleDocTemplate(
+        path,
+        pagesize=A4,
+        rightMargin=40,
+        leftMargin=40,
+        topMargin=40,
+        bottomMargin=40
+    )
+    doc.build(story)
+    return path
+
+
+def write_pdf(path, title, records):
+    # Single process, whole story in memory; see PdfRenderer for large crawls
+    return build_pdf(path, build_story(title, records, getSampleStyleSheet()))
+
+
+# =========================
+# PARALLEL RENDERING
+# =========================
+def render_part(path, record=None, title=None):
+    # Runs in a worker process: one record, or the title, laid out on its own
+    styles = getSampleStyleSheet()
+    story = title_story(title, styles) if title else []
+    if record is not None:
+        story.extend(record_story(record, styles))
+    return build_pdf(path, story)
+
+
+def merge_pdfs(path, parts):
+    # Copies the parts' pages into one file; the parts are never laid out again
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(part)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        writer.write(f)
+    os.replace(tmp_path, path)
+    return path
+
+
+class PdfRenderer:
+    # Lays out every record in a worker process as soon as the crawler hands
+    # it over, so rendering overlaps with scraping and no process ever holds
+    # more than one record's story. write() then only merges finished parts.
+    # Drop-in for write_pdf in crawler.write_outputs.
+    def __init__(self, workers=RENDER_WORKERS):
+        # Spawned, not forked: the crawler's browser threads are running
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self._dir = tempfile.mkdtemp(prefix="pdf_parts_")
+        self._parts = {}
+        self._numbers = itertools.count()
+
+    def _part_path(self):
+        return os.path.join(self._dir, f"part-{next(self._numbers)}.pdf")
+
+    def submit(self, record):
+        # Keyed by URL: the crawler finishes pages out of order
+        if record["url"] not in self._parts:
+            self._parts[record["url"]] = self._executor.submit(
+                render_part, self._part_path(), record
+            )
+
+    def write(self, path, title, records):
+        # Records the crawler did not hand over (unchanged pages of a family
+        # that changed) are laid out now; the title is a part of its own
+        title_part = self._executor.submit(render_part, self._part_path(), None, title)
+        for record in records:
+            self.submit(record)
+        parts = [title_part.result()] + [self._parts.pop(record["url"]).result() for record in records]
+        merge_pdfs(path, parts)
+        for part in parts:
+            os.remove(part)
+        return path
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+        shutil.rmtree(self._dir, ignore_errors=True)
@@ -0,0 +1,248 @@
+import os
+import shutil
+import threading
+import time
+
+import context_packer
+import metrics
+import resources
+import retrieval
+
+# A routed search returning fewer hits than this is retried globally
+MIN_SCOPED_HITS = 2
+
+# Shared by the Streamlit app and the offline tools (benchmark etc.), so
+# everything here must stay free of Streamlit calls.
+
+PROMPT_TEMPLATE = """
+You are an academic counselor chatbot for Sunbeam Institute.
+
+RULES:
+- Answer ONLY using the CONTEXT
+- Answer strictly in {language}
+- If missing, say:
+  "The requested information is not available in the provided documents."
+
+Context:
+{context}
+
+Question:
+{question}
+
+Answer:
+"""
+
+
+def build_prompt(context, question, language):
+    return PROMPT_TEMPLATE.format(context=context, question=question, language=language)
+
+
+# =========================
+# INGESTION
+# =========================
+def _unchanged(version):
+    import index_versions
+    import ingest
+    manifest = index_versions.read_json(os.path.join(version["path"], ingest.MANIFEST_NAME), {})
+    return {
+        "embedded": 0, "deleted": 0, "skipped_files": len(manifest.get("files", {})),
+        "corpus_version": manifest.get("corpus_version", ""), "version": version["name"],
+    }
+
+
+def _is_current(pdf_folder, version):
+    import ingest
+    return ingest.is_up_to_date(
+        pdf_folder, os.path.join(version["path"], ingest.MANIFEST_NAME), resources.EMBED_MODEL
+    )
+
+
+def ingest_pdfs(pdf_folder="pdfs", workers=None, wait=True):
+    # Single flight per host: one process builds a new index version while
+    # every query keeps reading the live one; the build is published by
+    # swapping current_index.json (see index_versions.py). Returns None when
+    # wait=False and another process is already building.
+    import bm25
+    import index_versions
+    import ingest
+
+    live = resources.live_version()
+    if _is_current(pdf_folder, live):
+        return _unchanged(live)
+
+    lock = index_versions.FileLock(os.path.join(resources.DB_PATH, index_versions.LOCK_NAME))
+    if not lock.acquire(blocking=wait):
+        return None
+    try:
+        # Whoever held the lock may have just published this very corpus
+        live = resources.live_version()
+        if _is_current(pdf_folder, live):
+            return _unchanged(live)
+
+        version = index_versions.new_version(resources.DB_PATH, resources.COLLECTION_NAME)
+        index_versions.write_status(resources.DB_PATH, "running", version=version["name"], started=time.time())
+        try:
+            with metrics.span("ingest") as span:
+                collection = resources.open_collection(version)
+                # Unchanged files keep their stored vectors; see ingest.py
+                span.count("seeded", index_versions.seed_version(
+                    resources.open_collection(live), collection, [
+                        (os.path.join(live["path"], name), os.path.join(version["path"], name))
+                        for name in (ingest.MANIFEST_NAME, bm25.INDEX_NAME)
+                    ]
+                ))
+                result = ingest.ingest_pdfs(
+                    collection,
+                    resources.get_embed_model(),
+                    pdf_folder,
+                    manifest_path=os.path.join(version["path"], ingest.MANIFEST_NAME),
+                    embed_model_name=resources.EMBED_MODEL,
+                    workers=workers,
+                    bm25_path=os.path.join(version["path"], bm25.INDEX_NAME)
+                )
+                span.count("chunks", result["embedded"])
+                span.count("skipped_files", result["skipped_files"])
+        except BaseException as e:
+            index_versions.write_status(resources.DB_PATH, "failed", version=version["name"], error=repr(e))
+            resources.drop_collection(version)
+            shutil.rmtree(version["path"], ignore_errors=True)
+            raise
+
+        index_versions.publish(resources.DB_PATH, version, live)
+        result["version"] = version["name"]
+        result["dropped_versions"] = index_versions.collect_garbage(resources.DB_PATH, resources.drop_collection)
+        index_versions.write_status(
+            resources.DB_PATH, "idle", version=version["name"], finished=time.time(),
+            embedded=result["embedded"], deleted=result["deleted"]
+        )
+        return result
+    finally:
+        lock.release()
+
+
+def has_index():
+    # False only before the very first build on this host
+    return resources.get_collection().count() > 0
+
+
+def ingest_status():
+    # A "running" status is only trusted while its builder holds the lock;
+    # one that died mid-build (killed, out of memory) left it behind
+    import index_versions
+    status = index_versions.read_status(resources.DB_PATH)
+    if status["state"] != "running":
+        return status
+    lock = index_versions.FileLock(os.path.join(resources.DB_PATH, index_versions.LOCK_NAME))
+    if not lock.acquire(blocking=False):
+        return status
+    try:
+        status = index_versions.read_status(resources.DB_PATH)
+        if status["state"] == "running":
+            index_versions.write_status(resources.DB_PATH, "interrupted", version=status.get("version"))
+            status = index_versions.read_status(resources.DB_PATH)
+        return status
+    finally:
+        lock.release()
+
+
+_background = {"thread": None}
+
+
+def start_background_ingest(pdf_folder="pdfs"):
+    # Once per process: rebuilds changed documents without blocking the UI;
+    # a no-op (without waiting) when another process holds the lock
+    with resources._locks["background_ingest"]:
+        if _background["thread"] is None:
+            _background["thread"] = threading.Thread(
+                target=ingest_pdfs, args=(pdf_folder,), kwargs={"wait": False},
+                name="ingest", daemon=True
+            )
+            _background["thread"].start()
+    return _background["thread"]
+
+
+# =========================
+# QUESTION ANSWERING
+# =========================
+def route_question(question, query_embedding, timing):
+    # Returns the router's decision, with timing["route"] in seconds
+    with metrics.span("query.route", routed=0) as span:
+        routing = resources.get_router().route(question, query_embedding)
+        span.count("routed", int(routing["scoped"]))
+    timing["route"] = span.seconds
+    return routing
+
+
+def search(question, query_embedding, top_k=context_packer.CANDIDATES, timing=None, where=None, route=None):
+    # Returns (hits, routing). timing, if given, receives "route" and
+    # "search" durations in seconds. where scopes the search by chunk
+    # metadata (see ingest.py); otherwise the query router picks the
+    # document families unless route=False / SUNBEAM_ROUTER=0
+    timing = {} if timing is None else timing
+    route = resources.ROUTE_QUERIES if route is None else route
+
+    routing = {"families": [], "where": where, "confidence": None, "scoped": where is not None, "fallback": False}
+    routed = False
+    if where is None and route:
+        routing.update(route_question(question, query_embedding, timing))
+        where, routed = routing["where"], routing["scoped"]
+
+    def run(scope):
+        return retrieval.hybrid_search(
+            resources.get_collection(), resources.get_bm25_index(),
+            query_embedding, question, top_k=top_k, where=scope
+        )
+
+    # Vector + BM25 fused with RRF: sharper top-k, so fewer chunks per prompt
+    with metrics.span("query.search", scoped=int(where is not None), fallback=0) as span:
+        hits = run(where)
+        if routed and len(hits) < MIN_SCOPED_HITS:
+            # The router was confident but its families hold almost nothing
+            hits = run(None)
+            routing["fallback"] = True
+            span.count("fallback", 1)
+        span.count("chunks", len(hits))
+    timing["search"] = span.seconds
+    return hits, routing
+
+
+def retrieve(question, top_k=context_packer.CANDIDATES, timing=None, use_cache=True, where=None, route=None):
+    # Returns (hits, query embedding, routing); timing additionally gets "embed"
+    timing = {} if timing is None else timing
+    embed_model = resources.get_embed_model()
+
+    with metrics.span("query.embed", cache_hits=0) as span:
+        if use_cache:
+            query_embedding, hit = resources.get_query_cache().embed_with_hit(embed_model, question)
+            span.count("cache_hits", int(hit))
+        else:
+            query_embedding = embed_model.embed_query(question)
+    timing["embed"] = span.seconds
+
+    hits, routing = search(question, query_embedding, top_k, timing, where, route)
+    return hits, query_embedding, routing
+
+
+def pack_prompt(question, language, hits, query_embedding, routing, timing=None):
+    # Returns (prompt, packing stats + the routing decision)
+    timing = {} if timing is None else timing
+
+    # De-duplicated, MMR-ordered and cut to the token budget
+    with metrics.span("query.pack") as span:
+        context, stats = context_packer.pack_context(hits, query_embedding)
+        prompt = build_prompt(context, question, language)
+        span.count("chunks", stats["chunks_out"])
+        span.count("prompt_chars", len(prompt))
+        span.count("tokens_saved", stats["tokens_saved"])
+    timing["pack"] = span.seconds
+
+    stats["route"] = routing
+    return prompt, stats
+
+
+def prepare_prompt(question, language, timing=None, use_cache=True, where=None):
+    # Returns (prompt, hits, packing stats + the routing decision)
+    timing = {} if timing is None else timing
+    hits, query_embedding, routing = retrieve(question, timing=timing, use_cache=use_cache, where=where)
+    prompt, stats = pack_prompt(question, language, hits, query_embedding, routing, timing)
+    return prompt, hits, stats
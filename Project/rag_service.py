@@ -0,0 +1,208 @@
+import asyncio
+import os
+import threading
+import time
+
+import llm_client
+import metrics
+import rag
+import resources
+import session_memory
+from session_memory import RetrievalMemory
+
+# Micro-batching: a batch closes at MAX_BATCH queries or MAX_WAIT seconds
+# after its first query, whichever comes first. While one batch is being
+# embedded the next one keeps filling, so batches grow with the load.
+MAX_BATCH = int(os.getenv("SUNBEAM_EMBED_BATCH", "32"))
+MAX_WAIT = float(os.getenv("SUNBEAM_EMBED_WAIT_MS", "5")) / 1000
+
+
+# =========================
+# MICRO-BATCHED QUERY EMBEDDING
+# =========================
+class MicroBatchEmbedder:
+    # Lives on the service's event loop; one embed_documents call per batch
+    # instead of one embed_query per user. MiniLM uses no query/document
+    # prefixes, so both give the same vectors.
+    def __init__(self, embed_model, query_cache=None, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.embed_model = embed_model
+        self.query_cache = query_cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = asyncio.Queue()
+        self._worker = None
+        self.batches = 0
+        self.queries = 0
+
+    async def embed(self, text):
+        # Returns (embedding, True if it came from the query cache)
+        if self.query_cache is not None:
+            embedding = self.query_cache.get(text)
+            if embedding is not None:
+                return embedding, True
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future, False
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            # The same question asked by several users is embedded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                with metrics.span("service.embed_batch", queries=len(batch), texts=len(texts)):
+                    vectors = await asyncio.to_thread(self.embed_model.embed_documents, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            by_text = dict(zip(texts, vectors))
+            for text, future in batch:
+                if self.query_cache is not None:
+                    self.query_cache.put(text, by_text[text])
+                if not future.done():
+                    future.set_result(by_text[text])
+            self.batches += 1
+            self.queries += len(batch)
+
+
+# =========================
+# RAG SERVICE
+# =========================
+class RagService:
+    # Retrieval and answering behind an asyncio API, independent of Streamlit.
+    # The service owns one event loop thread; every caller (each Streamlit
+    # session runs in its own thread) shares it, the embedder and the
+    # process-wide Chroma handle from resources.py.
+    def __init__(self, embed_model=None, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="rag-service", daemon=True)
+        self._thread.start()
+        self.embedder = MicroBatchEmbedder(
+            embed_model or resources.get_embed_model(), resources.get_query_cache(), max_batch, max_wait
+        )
+        self.memory = RetrievalMemory()
+
+    def call(self, coroutine):
+        # Blocking bridge for synchronous callers such as chatbot.py
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self):
+        self.call(self.embedder.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # ---------- async API ----------
+    async def retrieve(self, question, timing=None, where=None, chat=None):
+        # Returns (hits, search embedding, routing), like rag.retrieve. With a
+        # chat id, follow-ups are searched in the context of that chat's last
+        # turns, and its last chunks are reused when they would come back
+        # anyway (session_memory.py)
+        timing = {} if timing is None else timing
+        with metrics.span("query.embed", cache_hits=0) as span:
+            query_embedding, hit = await self.embedder.embed(question)
+            span.count("cache_hits", int(hit))
+        timing["embed"] = span.seconds
+
+        recent = self.memory.recent(chat) if chat else []
+        search_text, search_embedding, topic = session_memory.plan(question, query_embedding, recent)
+        follow_up = search_text != question
+        version = resources.corpus_version()
+        with metrics.span("query.memory", follow_ups=int(follow_up), reused=0) as span:
+            hits = session_memory.reusable(recent, search_embedding, where, version)
+            span.count("reused", int(hits is not None))
+
+        if hits is not None:
+            routing = dict(recent[0]["routing"], reused=True)
+            # Later turns are compared with the search that found these chunks
+            searched_with = recent[0]["search_embedding"]
+            timing["search"] = 0.0
+        else:
+            # Search runs in a worker thread so the loop keeps batching embeddings
+            hits, routing = await asyncio.to_thread(
+                rag.search, search_text, search_embedding, timing=timing, where=where
+            )
+            routing["reused"] = False
+            searched_with = search_embedding
+        routing["follow_up"] = follow_up
+        routing["overlap"] = session_memory.overlap(hits, recent[0]["hits"]) if recent else None
+
+        if chat:
+            self.memory.remember(chat, {
+                "question": question, "topic": topic, "query_embedding": query_embedding,
+                "search_embedding": searched_with, "hits": hits, "routing": routing,
+                "where": where, "corpus_version": version,
+            })
+        return hits, search_embedding, routing
+
+    async def remember(self, chat, question):
+        # A turn answered from the answer cache is remembered without a
+        # search, so a follow-up to it still finds its referent
+        query_embedding, _ = await self.embedder.embed(question)
+        self.memory.remember(chat, {
+            "question": question, "topic": question, "query_embedding": query_embedding,
+            "search_embedding": query_embedding, "hits": None, "routing": None,
+            "where": None, "corpus_version": None,
+        })
+
+    async def prepare_prompt(self, question, language, timing=None, where=None, chat=None):
+        # Returns (prompt, hits, stats), like rag.prepare_prompt
+        timing = {} if timing is None else timing
+        hits, query_embedding, routing = await self.retrieve(question, timing, where, chat)
+        prompt, stats = rag.pack_prompt(question, language, hits, query_embedding, routing, timing)
+        return prompt, hits, stats
+
+    # ---------- synchronous API (Streamlit) ----------
+    def cached_answer(self, question, language, chat=None):
+        # Returns (answer or None, corpus version to store the answer under).
+        # A follow-up depends on its chat, not only on its wording, so it is
+        # neither looked up nor stored (version None) in the shared cache,
+        # even when this process no longer remembers the chat (restart, TTL)
+        if session_memory.is_follow_up(question):
+            return None, None
+        version = resources.corpus_version()
+        with metrics.span("answer_cache.lookup", cache_hits=0) as span:
+            answer = resources.get_answer_cache().get(question, language, version)
+            span.count("cache_hits", int(answer is not None))
+        if answer is not None and chat:
+            self.call(self.remember(chat, question))
+        return answer, version
+
+    def store_answer(self, question, language, version, answer):
+        if version is not None:
+            resources.get_answer_cache().put(question, language, version, answer)
+
+    def prepare_prompt_sync(self, question, language, timing=None, where=None, chat=None):
+        return self.call(self.prepare_prompt(question, language, timing, where, chat))
+
+    def stream_answer(self, prompt, timing=None):
+        # Generator of text pieces; timing gets "ttft" and "total"
+        with metrics.span("llm", prompt_chars=len(prompt)):
+            yield from llm_client.stream_text(resources.get_llm(), prompt, timing)
+
+    def complete(self, prompt, timing=None):
+        with metrics.span("llm", prompt_chars=len(prompt)):
+            return llm_client.invoke_text(resources.get_llm(), prompt, timing)
@@ -0,0 +1,131 @@
+import threading
+import time
+
+from selenium.common.exceptions import (
+    JavascriptException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Adaptive timeout = clamp(FACTOR x typical wait, MIN_TIMEOUT, MAX_TIMEOUT)
+MIN_TIMEOUT = 2.0
+MAX_TIMEOUT = 20.0
+FACTOR = 4.0
+POLL = 0.1
+# How quiet (no new requests, no pending jQuery XHR) counts as network idle
+NETWORK_QUIET = 0.5
+
+
+# =========================
+# CONDITIONS
+# =========================
+# Each condition is a callable(driver) -> truthy once the page is ready.
+def document_ready():
+    return lambda driver: driver.execute_script("return document.readyState") == "complete"
+
+
+def present(css):
+    return lambda driver: driver.find_elements(By.CSS_SELECTOR, css) or False
+
+
+def expanded(panel, css=".panel-collapse"):
+    # Bootstrap 3 accordions go collapse -> collapsing -> collapse in
+    def condition(driver):
+        return driver.execute_script("""
+            const el = arguments[0].querySelector(arguments[1]);
+            return !!el && !el.classList.contains('collapsing')
+                && (el.classList.contains('in') || el.offsetHeight > 0);
+        """, panel, css)
+    return condition
+
+
+class network_idle:
+    def __init__(self, quiet=NETWORK_QUIET):
+        self.quiet = quiet
+        self.last_count = None
+        self.since = None
+
+    def __call__(self, driver):
+        state = driver.execute_script("""
+            return [performance.getEntriesByType('resource').length,
+                    window.jQuery ? jQuery.active : 0];
+        """)
+        now = time.perf_counter()
+        if state[1] or state[0] != self.last_count:
+            self.last_count, self.since = state[0], now
+            return False
+        return now - self.since >= self.quiet
+
+
+# =========================
+# ADAPTIVE TIMEOUTS
+# =========================
+class AdaptiveTimeouts:
+    # Learns a typical wait per condition name (EWMA) across all pages and
+    # browsers, so fast pages fail fast and slow ones still get headroom
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self._typical = {}
+        self._lock = threading.Lock()
+
+    def timeout(self, name, attempt=0):
+        # Doubled on every retry of a page, so a page that got slower can
+        # still be waited for, succeed and raise the typical wait
+        with self._lock:
+            typical = self._typical.get(name)
+        if typical is None:
+            return MAX_TIMEOUT
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, FACTOR * typical) * 2 ** attempt)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            typical = self._typical.get(name)
+            self._typical[name] = seconds if typical is None else (
+                self.alpha * seconds + (1 - self.alpha) * typical
+            )
+
+
+TIMEOUTS = AdaptiveTimeouts()
+
+
+# =========================
+# PER-PAGE READINESS
+# =========================
+class Readiness:
+    def __init__(self, driver, timeouts=TIMEOUTS, attempt=0):
+        self.driver = driver
+        self.timeouts = timeouts
+        self.attempt = attempt
+        self.waited = 0.0
+        self.waits = {}
+
+    def until(self, name, condition, timeout=None):
+        # Raises TimeoutException if the condition never holds
+        timeout = timeout or self.timeouts.timeout(name, self.attempt)
+        start = time.perf_counter()
+        try:
+            result = WebDriverWait(
+                self.driver, timeout, poll_frequency=POLL,
+                ignored_exceptions=(
+                    JavascriptException, NoSuchElementException, StaleElementReferenceException
+                )
+            ).until(condition)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.waited += elapsed
+            self.waits[name] = self.waits.get(name, 0.0) + elapsed
+        # Only waits that ended with the condition holding say how long it
+        # typically takes; a timeout (say, a page without panels) only says
+        # it never came, and would feed the timeout back into itself
+        self.timeouts.observe(name, elapsed)
+        return result
+
+    def optional(self, name, condition, timeout=None):
+        # For things some pages simply don't have (e.g. pages without panels)
+        try:
+            return self.until(name, condition, timeout)
+        except TimeoutException:
+            return None
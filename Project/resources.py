@@ -0,0 +1,252 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+# =========================
+# SETTINGS
+# =========================
+EMBED_MODEL = "huggingface:sentence-transformers/all-MiniLM-L6-v2"
+LLM_MODEL = "llama-3.3-70b-versatile"
+# Smaller, faster model used when the main one is rate-limited, failing or
+# too slow for the deadline in llm_client.py; SUNBEAM_LLM_FALLBACK= disables it
+LLM_FALLBACK_MODEL = os.getenv("SUNBEAM_LLM_FALLBACK", "llama-3.1-8b-instant")
+# SUNBEAM_LLM_PROVIDER=fake swaps Groq for a local streaming fake model
+LLM_PROVIDER = os.getenv("SUNBEAM_LLM_PROVIDER", "groq")
+DB_PATH = "./chroma_db"
+COLLECTION_NAME = "sunbeam_docs"
+# SUNBEAM_VECTOR_STORE=compact swaps Chroma for the memory-mapped NumPy store
+# in vector_store.py (dtype from SUNBEAM_VECTOR_DTYPE: float16 or int8)
+VECTOR_STORE = os.getenv("SUNBEAM_VECTOR_STORE", "chroma")
+VECTOR_DTYPE = os.getenv("SUNBEAM_VECTOR_DTYPE", "float16")
+
+# Set SUNBEAM_STREAM=0 to wait for the full completion before rendering
+STREAM_ANSWERS = os.getenv("SUNBEAM_STREAM", "1") != "0"
+
+# Set SUNBEAM_ROUTER=0 to always search the whole collection
+ROUTE_QUERIES = os.getenv("SUNBEAM_ROUTER", "1") != "0"
+
+# Set SUNBEAM_WARMUP=0 to skip loading MiniLM in the background on first run
+WARMUP_ENABLED = os.getenv("SUNBEAM_WARMUP", "1") != "0"
+
+# =========================
+# PROCESS-WIDE SINGLETONS
+# =========================
+# Streamlit re-executes chatbot.py on every interaction, but imported modules
+# stay in sys.modules, so everything stored here is built once per process
+# and shared by all reruns and sessions.
+_resources = {}
+_locks = defaultdict(threading.Lock)
+build_seconds = {}
+
+
+def _get(name, factory):
+    if name in _resources:
+        return _resources[name]
+    with _locks[name]:
+        if name not in _resources:
+            start = time.perf_counter()
+            _resources[name] = factory()
+            build_seconds[name] = time.perf_counter() - start
+    return _resources[name]
+
+
+def get_embed_model():
+    def build():
+        from langchain.embeddings import init_embeddings
+        return init_embeddings(model=EMBED_MODEL)
+    return _get("embeddings", build)
+
+
+def get_llm():
+    def build():
+        from llm_client import DEADLINE, ResilientLLM, make_fake_llm
+
+        if LLM_PROVIDER == "fake":
+            # The fallback fake never injects faults
+            return ResilientLLM([("fake", make_fake_llm()), ("fake-fallback", make_fake_llm(latency=0, error_rate=0))])
+
+        from langchain.chat_models import init_chat_model
+
+        def chat_model(model):
+            # Retries and deadlines are ResilientLLM's job, not the SDK's
+            return init_chat_model(
+                model=model,
+                model_provider=LLM_PROVIDER,
+                api_key=os.getenv("GROQ_API_KEY"),
+                timeout=DEADLINE,
+                max_retries=0
+            )
+
+        models = [(LLM_MODEL, chat_model(LLM_MODEL))]
+        if LLM_FALLBACK_MODEL:
+            models.append((LLM_FALLBACK_MODEL, chat_model(LLM_FALLBACK_MODEL)))
+        return ResilientLLM(models)
+    return _get("llm", build)
+
+
+def get_chroma_client():
+    def build():
+        import chromadb
+        return chromadb.PersistentClient(path=DB_PATH)
+    return _get("chroma_client", build)
+
+
+def open_collection(version):
+    # version: see index_versions.py; every version has its own collection
+    if VECTOR_STORE == "compact":
+        from vector_store import CompactCollection, STORE_NAME
+        return CompactCollection(os.path.join(version["path"], STORE_NAME), VECTOR_DTYPE)
+    return get_chroma_client().get_or_create_collection(version["collection"])
+
+
+def drop_collection(version):
+    if VECTOR_STORE == "compact":
+        import shutil
+        from vector_store import STORE_NAME
+        shutil.rmtree(os.path.join(version["path"], STORE_NAME), ignore_errors=True)
+        return
+    try:
+        get_chroma_client().delete_collection(version["collection"])
+    except Exception:
+        pass  # already gone
+
+
+def live_version():
+    import index_versions
+    return index_versions.active_version(DB_PATH) or index_versions.legacy_version(DB_PATH, COLLECTION_NAME)
+
+
+_live = {"stamp": None, "name": None, "collection": None}
+
+
+def _pointer_stamp():
+    import index_versions
+    try:
+        stat = os.stat(os.path.join(DB_PATH, index_versions.POINTER_NAME))
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def get_collection():
+    # Follows current_index.json: a published build is picked up by the
+    # next query, and a build in progress is never visible
+    stamp = _pointer_stamp()
+    if _live["collection"] is not None and _live["stamp"] == stamp:
+        return _live["collection"]
+    with _locks["collection"]:
+        if _live["collection"] is None or _live["stamp"] != stamp:
+            version = live_version()
+            if version["name"] != _live["name"] or _live["collection"] is None:
+                _live["collection"] = open_collection(version)
+                _live["name"] = version["name"]
+            _live["stamp"] = stamp
+        return _live["collection"]
+
+
+_bm25 = {"mtime": None, "index": None}
+
+
+def get_bm25_index():
+    # Reloaded only when ingestion has rewritten the file
+    import bm25
+
+    path = os.path.join(live_version()["path"], bm25.INDEX_NAME)
+    try:
+        stamp = (path, os.path.getmtime(path))
+    except OSError:
+        return None
+    with _locks["bm25"]:
+        if _bm25["mtime"] != stamp:
+            _bm25["index"] = bm25.BM25Index.load(path)
+            _bm25["mtime"] = stamp
+        return _bm25["index"]
+
+
+_router = {"version": None, "router": None}
+
+
+def get_router():
+    # Family centroids are recomputed only when the corpus has changed
+    import router
+
+    version = corpus_version()
+    with _locks["router"]:
+        if _router["router"] is None or _router["version"] != version:
+            _router["router"] = router.QueryRouter(router.centroids_from_collection(get_collection()))
+            _router["version"] = version
+        return _router["router"]
+
+
+def get_query_cache():
+    def build():
+        from cache import QueryEmbeddingCache
+        return QueryEmbeddingCache()
+    return _get("query_cache", build)
+
+
+def get_answer_cache():
+    def build():
+        from cache import AnswerCache
+        return AnswerCache(os.path.join(DB_PATH, "answer_cache.sqlite3"))
+    return _get("answer_cache", build)
+
+
+def get_chat_history():
+    def build():
+        from chat_history import ChatHistory
+        return ChatHistory(os.path.join(DB_PATH, "chat_history.sqlite3"))
+    return _get("chat_history", build)
+
+
+def get_rag_service():
+    def build():
+        from rag_service import RagService
+        return RagService()
+    return _get("rag_service", build)
+
+
+def corpus_version():
+    import ingest
+    return ingest.read_corpus_version(os.path.join(live_version()["path"], ingest.MANIFEST_NAME))
+
+
+# =========================
+# BACKGROUND WARM-UP
+# =========================
+_warmup_thread = None
+
+
+def _warm_up():
+    start = time.perf_counter()
+    embedding = get_embed_model().embed_query("warm up")
+    collection = get_collection()
+    if collection.count():
+        collection.query(query_embeddings=[embedding], n_results=1)
+    build_seconds["warmup"] = time.perf_counter() - start
+
+
+def warm_up():
+    global _warmup_thread
+    if not WARMUP_ENABLED:
+        return
+    with _locks["warmup"]:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, name="warmup", daemon=True)
+            _warmup_thread.start()
+
+
+# =========================
+# COLD VS WARM RUN TIMING
+# =========================
+run_stats = {"runs": 0, "cold_seconds": None, "last_seconds": None}
+
+
+def record_run(seconds):
+    with _locks["run_stats"]:
+        run_stats["runs"] += 1
+        if run_stats["cold_seconds"] is None:
+            run_stats["cold_seconds"] = seconds
+        run_stats["last_seconds"] = seconds
+        return dict(run_stats)
@@ -0,0 +1,76 @@
+TOP_K = 5
+# Candidates pulled from each retriever before fusion
+FETCH_K = 20
+# Standard RRF damping constant; larger values flatten the rank curve
+RRF_K = 60
+
+
+# =========================
+# RECIPROCAL-RANK FUSION
+# =========================
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+# =========================
+# HYBRID SEARCH
+# =========================
+def hybrid_search(collection, lexical_index, query_embedding, question,
+                  top_k=TOP_K, fetch_k=FETCH_K, where=None):
+    # Returns [{"id", "document", "metadata", "embedding", "score"}], best first.
+    # where is a Chroma metadata filter, e.g. {"doc_type": "courses"} or
+    # {"course": {"$in": [...]}}; both retrievers then only see that scope.
+    vector = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=fetch_k,
+        where=where,
+        include=["documents", "metadatas", "embeddings"]
+    )
+    found = {
+        doc_id: (document, metadata, embedding)
+        for doc_id, document, metadata, embedding in zip(
+            vector["ids"][0], vector["documents"][0],
+            vector["metadatas"][0], vector["embeddings"][0]
+        )
+    }
+    rankings = [vector["ids"][0]]
+
+    if lexical_index is not None:
+        lexical = [doc_id for doc_id, _ in lexical_index.search(question, fetch_k)]
+        if where is not None and lexical:
+            # BM25 has no metadata; keep only candidates inside the scope
+            # (fetched with their text, so no second lookup is needed below)
+            stored = collection.get(ids=lexical, where=where, include=["documents", "metadatas", "embeddings"])
+            for doc_id, document, metadata, embedding in zip(
+                stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"]
+            ):
+                found.setdefault(doc_id, (document, metadata, embedding))
+            lexical = [doc_id for doc_id in lexical if doc_id in found]
+        rankings.append(lexical)
+
+    fused = reciprocal_rank_fusion(rankings)[:top_k]
+
+    # Lexical-only hits still need their text and metadata from Chroma
+    missing = [doc_id for doc_id, _ in fused if doc_id not in found]
+    if missing:
+        stored = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+        for doc_id, document, metadata, embedding in zip(
+            stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"]
+        ):
+            found[doc_id] = (document, metadata, embedding)
+
+    return [
+        {
+            "id": doc_id,
+            "document": found[doc_id][0],
+            "metadata": found[doc_id][1],
+            "embedding": found[doc_id][2],
+            "score": score,
+        }
+        for doc_id, score in fused
+        if doc_id in found
+    ]
@@ -0,0 +1,89 @@
+import math
+import re
+
+from context_packer import cosine
+
+# Families match the doc_type chunk metadata written by ingest.py
+FAMILIES = ("about", "course_list", "courses", "internship")
+
+# Keyword rules: each match adds KEYWORD_WEIGHT to that family's similarity
+KEYWORDS = {
+    "about": r"\b(about sunbeam|branch(es)?|address|location|located|contact|phone|e-?mail|"
+             r"hinjawadi|market yard|karad|founded|established|history|director|library|office)\b",
+    "course_list": r"\b(list of courses|which courses|what courses|all courses|courses (do you )?offer(ed)?|"
+                   r"available courses|modular courses)\b",
+    "courses": r"\b(syllabus|curriculum|prerequisites?|pre-requisites?|duration|batch|schedule|"
+               r"fees?|outcomes?|recorded videos?|spark|kafka|java|python|devops|ml|ai|dsa|react|mern)\b",
+    "internship": r"\b(internships?|intern|industrial training|placements?|stipend|associates)\b",
+}
+KEYWORD_WEIGHT = 0.15
+# Softmax temperature over the scores; lower trusts small gaps more
+TEMPERATURE = 0.05
+# Families are added best-first until they hold this much probability ...
+COVERAGE = 0.8
+# ... and if that takes more than MAX_FAMILIES, the router isn't sure: search everything
+MAX_FAMILIES = 2
+
+_patterns = {family: re.compile(pattern, re.IGNORECASE) for family, pattern in KEYWORDS.items()}
+
+
+def centroids_from_collection(collection):
+    # Mean MiniLM embedding of every family's chunks
+    centroids = {}
+    for family in FAMILIES:
+        stored = collection.get(where={"doc_type": family}, include=["embeddings"])
+        embeddings = stored.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            continue
+        size = len(embeddings[0])
+        centroids[family] = [sum(float(e[i]) for e in embeddings) / len(embeddings) for i in range(size)]
+    return centroids
+
+
+def where_for(families):
+    if len(families) == 1:
+        return {"doc_type": families[0]}
+    return {"doc_type": {"$in": list(families)}}
+
+
+# =========================
+# ROUTER
+# =========================
+class QueryRouter:
+    def __init__(self, centroids):
+        self.centroids = centroids
+
+    def scores(self, question, query_embedding):
+        return {
+            family: cosine(query_embedding, centroid)
+            + KEYWORD_WEIGHT * len(_patterns[family].findall(question))
+            for family, centroid in self.centroids.items()
+        }
+
+    def route(self, question, query_embedding):
+        # Returns {"families", "where", "confidence", "scoped"}; where is None
+        # (global search) when the store has no family metadata yet or the
+        # question doesn't clearly belong to one or two families
+        scores = self.scores(question, query_embedding)
+        if len(scores) < 2:
+            return {"families": sorted(scores), "where": None, "confidence": 0.0, "scoped": False}
+
+        best = max(scores.values())
+        weights = {family: math.exp((score - best) / TEMPERATURE) for family, score in scores.items()}
+        total = sum(weights.values())
+        ranked = sorted(weights, key=lambda family: -weights[family])
+
+        families, confidence = [], 0.0
+        for family in ranked:
+            families.append(family)
+            confidence += weights[family] / total
+            if confidence >= COVERAGE:
+                break
+
+        scoped = len(families) <= MAX_FAMILIES and len(families) < len(scores)
+        return {
+            "families": families if scoped else ranked,
+            "where": where_for(families) if scoped else None,
+            "confidence": confidence,
+            "scoped": scoped,
+        }
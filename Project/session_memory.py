@@ -0,0 +1,183 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from cache import normalize_question
+from context_packer import cosine
+
+# Turns remembered per chat, and chats remembered per process (LRU)
+MEMORY_TURNS = 3
+MAX_SESSIONS = 200
+SESSION_TTL = 2 * 3600
+# A follow-up is searched with this share of its own embedding; the rest
+# comes from the previous turns, each one worth half the turn after it
+QUERY_WEIGHT = 0.6
+# The previous turn's chunks are reused when the new search embedding is
+# this close to the one they were retrieved with: their top-k would be
+# (nearly) the same, so the Chroma round-trip is skipped
+REUSE_SIMILARITY = 0.92
+
+# A question is read as a follow-up when it opens like one, or leans on a
+# pronoun pointing back to an earlier turn. Length alone says nothing:
+# "DAC course fees" is a new topic.
+FOLLOW_UP_PREFIXES = ("and ", "also ", "what about ", "how about ", "same for ", "then ")
+FOLLOW_UP_WORDS = {
+    # English
+    "it", "its", "they", "them", "their", "he", "she", "him", "his", "her",
+    # Hindi
+    "इसकी", "इसका", "इसके", "इसमें", "उसकी", "उसका", "उसके", "उसमें",
+    # Marathi
+    "त्याची", "त्याचा", "त्याचे", "त्यात", "याची", "याचा", "याचे", "यात",
+}
+# Demonstratives point back whether or not a noun follows ("is that
+# course online?", "fees for this?"), except in time phrases ("this year")
+# and when "that" opens a clause: a relative one after a noun ("courses
+# that cover Java") or a that-clause ("is it true that the fees...")
+DEMONSTRATIVES = {"this", "that", "these", "those"}
+TIME_WORDS = {
+    "year", "month", "week", "weekend", "semester", "term", "time",
+    "morning", "afternoon", "evening", "summer", "winter",
+}
+CLAUSE_STARTERS = {"the", "a", "an", "i", "you", "we", "he", "she", "they", "it", "there"}
+BEFORE_DEMONSTRATIVE = {
+    "is", "are", "was", "were", "does", "do", "did", "will", "can", "about",
+    "for", "of", "in", "on", "with", "like", "after", "before", "than", "from", "to",
+}
+CLAUSE_VERBS = {
+    "is", "are", "was", "were", "has", "have", "will", "can", "include", "includes",
+    "cost", "costs", "cover", "covers", "require", "requires", "offer", "offers",
+    "teach", "teaches", "provide", "provides", "start", "starts", "run", "runs",
+}
+# "it" stands for nothing in "is it possible to join online?"
+EXPLETIVE_ADJECTIVES = {
+    "possible", "necessary", "mandatory", "compulsory", "required", "okay", "ok",
+    "easy", "hard", "difficult", "better", "worth", "true",
+}
+
+
+def words(question):
+    return normalize_question(question).split()
+
+
+def _points_back(tokens, i):
+    token = tokens[i]
+    before = tokens[i - 1] if i else None
+    after = tokens[i + 1:i + 3]
+    if token == "it":
+        # "is it possible to...", "it is mandatory to..."
+        if after[:1] == ["is"]:
+            after = after[1:]
+        return not after or after[0] not in EXPLETIVE_ADJECTIVES
+    if token in FOLLOW_UP_WORDS:
+        return True
+    if token not in DEMONSTRATIVES:
+        return False
+    after = after[0] if after else None
+    if after in TIME_WORDS:
+        return False
+    if token == "that" and (
+        after in CLAUSE_STARTERS
+        or (before is not None and before not in BEFORE_DEMONSTRATIVE and after in CLAUSE_VERBS)
+    ):
+        return False
+    return True
+
+
+def is_follow_up(question):
+    tokens = words(question)
+    return (
+        (" ".join(tokens) + " ").startswith(FOLLOW_UP_PREFIXES)
+        or any(_points_back(tokens, i) for i in range(len(tokens)))
+    )
+
+
+def _unit(vector):
+    norm = math.sqrt(sum(float(x) ** 2 for x in vector))
+    return [float(x) / norm for x in vector] if norm else [float(x) for x in vector]
+
+
+def blend(query_embedding, context_embeddings, query_weight=QUERY_WEIGHT):
+    # context_embeddings: newest first. Unit vectors in, unit vector out.
+    if not context_embeddings:
+        return query_embedding
+    weights = [0.5 ** i for i in range(len(context_embeddings))]
+    total = sum(weights)
+    blended = [query_weight * x for x in _unit(query_embedding)]
+    for weight, embedding in zip(weights, context_embeddings):
+        share = (1 - query_weight) * weight / total
+        blended = [b + share * x for b, x in zip(blended, _unit(embedding))]
+    return _unit(blended)
+
+
+# =========================
+# PER-SESSION RETRIEVAL MEMORY
+# =========================
+class RetrievalMemory:
+    # In-process memory of each chat's last turns: the question, its own
+    # embedding and the embedding it was searched with. Only the newest turn
+    # keeps its chunks (ids, documents and embeddings). Keyed by chat id
+    # (chat_history.py); a new chat starts empty, abandoned ones age out.
+    def __init__(self, turns=MEMORY_TURNS, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL):
+        self.turns = turns
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def recent(self, chat):
+        # Newest first
+        with self._lock:
+            session = self._sessions.get(chat)
+            if session is None or time.time() - session["updated"] > self.ttl:
+                return []
+            return list(session["turns"])
+
+    def remember(self, chat, turn):
+        with self._lock:
+            session = self._sessions.setdefault(chat, {"turns": deque(maxlen=self.turns), "updated": 0})
+            if session["turns"]:
+                session["turns"][0] = dict(session["turns"][0], hits=None)
+            session["turns"].appendleft(turn)
+            session["updated"] = time.time()
+            self._sessions.move_to_end(chat)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def forget(self, chat):
+        with self._lock:
+            self._sessions.pop(chat, None)
+
+
+def plan(question, query_embedding, recent):
+    # Returns (search text, search embedding, topic). A follow-up is searched
+    # together with the question that started the topic (BM25 and the router
+    # see its referent) and with an embedding leaning towards the recent
+    # turns. topic is the question to remember as this turn's topic.
+    if not recent or not is_follow_up(question):
+        return question, query_embedding, question
+    topic = recent[0]["topic"]
+    search_embedding = blend(query_embedding, [turn["query_embedding"] for turn in recent])
+    return f"{topic} {question}", search_embedding, topic
+
+
+def reusable(recent, search_embedding, where, corpus_version):
+    # The previous turn's hits, re-ranked for the new embedding, or None
+    if not recent:
+        return None
+    last = recent[0]
+    if last["where"] != where or last["corpus_version"] != corpus_version:
+        return None
+    if not last["hits"] or any(hit.get("embedding") is None for hit in last["hits"]):
+        return None
+    if cosine(search_embedding, last["search_embedding"]) < REUSE_SIMILARITY:
+        return None
+    return sorted(last["hits"], key=lambda hit: -cosine(search_embedding, hit["embedding"]))
+
+
+def overlap(hits, previous_hits):
+    # Share of this turn's chunks the previous turn had already retrieved
+    if not hits or not previous_hits:
+        return 0.0
+    previous = {hit["id"] for hit in previous_hits}
+    return sum(hit["id"] in previous for hit in hits) / len(hits)
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Request path (with query) -> saved page, for the paths crawler.py requests
+ROUTES = {
+    "/about-us.php": "about-us.html",
+    "/sunbeam-branches-home": "branches.html",
+    "/branch-details.php?bdid=1": "branch-1.html",
+    "/branch-details.php?bdid=5": "branch-5.html",
+    "/modular-courses-home": "modular-courses-home.html",
+    "/modular-courses": "modular-courses.html",
+    "/modular-courses/python-development": "course-python.html",
+    "/modular-courses/core-java": "course-java.html",
+    "/modular-courses/react": "course-js-only.html",
+    "/internship": "internship.html",
+}
+
+
+def read_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+# =========================
+# LOCAL FIXTURE SITE
+# =========================
+class FixtureSite:
+    # Serves the saved pages with an ETag and answers If-None-Match with 304,
+    # like the real site. Tests edit a page through `overrides`.
+    def __init__(self):
+        self.overrides = {}
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append(self.path)
+                html = site.page(self.path)
+                if html is None:
+                    self.send_error(404)
+                    return
+                data = html.encode("utf-8")
+                etag = '"%s"' % hashlib.sha1(data).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def page(self, path):
+        if path in self.overrides:
+            return self.overrides[path]
+        if path in ROUTES:
+            return read_fixture("site", ROUTES[path])
+        return None
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fixture_site():
+    site = FixtureSite()
+    yield site
+    site.close()
+
+
+# =========================
+# CORPUS AND EMBEDDINGS
+# =========================
+COURSES_FILE = "Sunbeam_Modular_Courses_COMPLETE_INFO.jsonl"
+
+
+class CountingEmbeddings:
+    # Deterministic vectors; counts the texts it was asked to embed
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+
+def write_courses(folder, courses, name=COURSES_FILE):
+    # The crawler's JSONL corpus: one line per (course, section)
+    with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+        for course in courses:
+            for section in ("Fees", "Syllabus"):
+                f.write(json.dumps({
+                    "family": "courses", "course": course, "section": section,
+                    "content": f"{course} {section.lower()} details", "source_url": f"http://site/{course}",
+                }) + "\n")
@@ -0,0 +1,69 @@
+import sqlite3
+
+from crawl_cache import CrawlCache
+
+LIST_PAGE = {"title": "Modular Courses", "sections": [{"title": None, "content": "Python Development"}]}
+COURSE_URLS = ["http://site/modular-courses/python-development"]
+
+
+def test_jobs_sharing_a_url_keep_separate_entries(tmp_path):
+    cache = CrawlCache(str(tmp_path / "cache.sqlite3"))
+    url = "http://site/modular-courses"
+    for expected in ("added", "unchanged", "unchanged"):
+        # One crawl: the course_list page and the courses discovery of the same URL
+        assert cache.update("course_list", "page_text", url, LIST_PAGE, etag='"a"')[0] == expected
+        assert cache.update("courses", "discover", url, COURSE_URLS, etag='"a"')[0] == expected
+
+    assert cache.get("course_list", "page_text", url)["result"] == LIST_PAGE
+    assert cache.get("courses", "discover", url)["result"] == COURSE_URLS
+    assert cache.urls("course_list") == [url]
+    assert cache.validators("courses", "discover", url) == {"If-None-Match": '"a"'}
+
+
+def test_remove_only_touches_its_family(tmp_path):
+    cache = CrawlCache(str(tmp_path / "cache.sqlite3"))
+    url = "http://site/modular-courses"
+    cache.update("course_list", "page_text", url, LIST_PAGE)
+    cache.update("courses", "discover", url, COURSE_URLS)
+
+    cache.remove("course_list", [url])
+    assert cache.urls("course_list") == []
+    assert cache.get("courses", "discover", url) is not None
+
+
+def test_url_keyed_cache_is_rebuilt(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE pages (url TEXT PRIMARY KEY, family TEXT, etag TEXT, last_modified TEXT, "
+                 "content_hash TEXT, result TEXT, fetched_at REAL)")
+    conn.execute("INSERT INTO pages VALUES ('u', 'about', NULL, NULL, 'x', '{}', 0)")
+    conn.commit()
+    conn.close()
+
+    cache = CrawlCache(path)
+    assert cache.urls("about") == []
+    assert cache.update("about", "page_text", "u", LIST_PAGE)[0] == "added"
+
+
+def test_only_http_results_are_revalidated(tmp_path):
+    cache = CrawlCache(str(tmp_path / "cache.sqlite3"))
+    cache.update("courses", "course", "http://site/a", LIST_PAGE, etag='"a"', fetch_tier="browser")
+    cache.update("courses", "course", "http://site/b", LIST_PAGE, etag='"b"', fetch_tier="http")
+
+    assert cache.validators("courses", "course", "http://site/a") == {}
+    assert cache.validators("courses", "course", "http://site/b") == {"If-None-Match": '"b"'}
+
+
+def test_cache_without_tiers_is_migrated(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE pages (family TEXT, kind TEXT, url TEXT, etag TEXT, last_modified TEXT, "
+                 "content_hash TEXT, result TEXT, fetched_at REAL, PRIMARY KEY (family, kind, url))")
+    conn.execute("""INSERT INTO pages VALUES ('about', 'page_text', 'u', '"e"', NULL, 'x', '{}', 0)""")
+    conn.commit()
+    conn.close()
+
+    cache = CrawlCache(path)
+    # A row of unknown tier is refetched in full, never trusted on a 304
+    assert cache.get("about", "page_text", "u")["fetch_tier"] is None
+    assert cache.validators("about", "page_text", "u") == {}
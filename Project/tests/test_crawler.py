@@ -0,0 +1,172 @@
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("requests")
+pytest.importorskip("selenium")
+
+import crawler
+from conftest import read_fixture
+from crawl_cache import CrawlCache
+
+# Every page of the fixture site parses over plain HTTP, so no browser starts
+# (DriverPool only launches Chrome when a job asks for one)
+PATHS = [
+    "/about-us.php",
+    "/sunbeam-branches-home",
+    "/branch-details.php?bdid=1",
+    "/branch-details.php?bdid=5",
+    "/modular-courses-home",
+    "/modular-courses",
+    "/modular-courses/python-development",
+    "/modular-courses/core-java",
+    "/internship",
+]
+
+
+def test_crawl_fixture_site_over_http(fixture_site):
+    by_family, failures, tiers, changes = crawler.crawl(fixture_site.url, workers=2)
+
+    assert failures == []
+    assert tiers == {fixture_site.url + path: "http" for path in PATHS}
+    assert [record["title"] for record in by_family["about"]] == [title for title, _ in crawler.ABOUT_PAGES]
+    assert [record["title"] for record in by_family["course_list"]] == ["Modular Courses"]
+    # Discovery order, with the off-site link of the home page left out
+    assert [record["url"] for record in by_family["courses"]] == [
+        fixture_site.url + "/modular-courses/python-development",
+        fixture_site.url + "/modular-courses/core-java",
+    ]
+    assert [record["title"] for record in by_family["courses"]] == ["Python Development", "Core Java"]
+    assert [section["title"] for section in by_family["courses"][1]["sections"]] == [
+        "Course Overview", "Syllabus"
+    ]
+    assert len(by_family["internship"]) == 1
+    assert all(record["fetch_tier"] == "http" for records in by_family.values() for record in records)
+    assert not any("example.com" in url for url in tiers)
+    assert all(len(changes[family]["added"]) == len(by_family[family]) for family in crawler.OUTPUTS)
+
+
+def test_recrawl_is_not_modified_until_a_page_changes(fixture_site, tmp_path):
+    cache = CrawlCache(str(tmp_path / "crawl_cache.sqlite3"))
+    crawler.crawl(fixture_site.url, workers=2, cache=cache)
+
+    handed = []
+    by_family, _, tiers, changes = crawler.crawl(fixture_site.url, workers=2, cache=cache, on_record=handed.append)
+    assert set(tiers.values()) == {"not_modified"}
+    assert handed == []
+    assert not any(crawler.family_changed(summary) for summary in changes.values())
+    assert changes["courses"]["unchanged"] == 2
+    assert [record["title"] for record in by_family["courses"]] == ["Python Development", "Core Java"]
+
+    java = fixture_site.url + "/modular-courses/core-java"
+    fixture_site.overrides["/modular-courses/core-java"] = read_fixture("site", "course-java.html").replace(
+        "Collections and generics", "Collections, generics and streams"
+    )
+    by_family, _, tiers, changes = crawler.crawl(fixture_site.url, workers=2, cache=cache, on_record=handed.append)
+    assert tiers[java] == "http"
+    # Only the changed page is handed over (e.g. to the PDF renderer)
+    assert [record["url"] for record in handed] == [java]
+    assert tiers[fixture_site.url + "/modular-courses/python-development"] == "not_modified"
+    assert [(item["url"], item["sections"]) for item in changes["courses"]["changed"]] == [(java, ["Syllabus"])]
+    assert not crawler.family_changed(changes["about"])
+    assert "streams" in by_family["courses"][1]["sections"][1]["content"]
+
+
+def fail_page(monkeypatch, url):
+    run_job = crawler.run_job
+
+    def flaky(pool, job, *args):
+        if job["url"] == url:
+            raise crawler.WebDriverException("browser crashed")
+        return run_job(pool, job, *args)
+
+    monkeypatch.setattr(crawler, "run_job", flaky)
+
+
+def test_failed_page_keeps_its_cached_record(fixture_site, tmp_path, monkeypatch):
+    cache = CrawlCache(str(tmp_path / "crawl_cache.sqlite3"))
+    out = tmp_path / "pdfs"
+    crawler.write_outputs(crawler.crawl(fixture_site.url, workers=2, cache=cache)[0], str(out))
+
+    python = fixture_site.url + "/modular-courses/python-development"
+    fail_page(monkeypatch, python)
+    fixture_site.overrides["/modular-courses/core-java"] = read_fixture("site", "course-java.html").replace(
+        "Collections and generics", "Collections, generics and streams"
+    )
+    by_family, failures, tiers, changes = crawler.crawl(fixture_site.url, workers=2, cache=cache)
+    assert failures == [python]
+    assert tiers[python] == "cached"
+    assert changes["courses"]["removed"] == []
+    written = crawler.write_outputs(by_family, str(out), changes)
+
+    corpus = (out / "Sunbeam_Modular_Courses_COMPLETE_INFO.jsonl").read_text(encoding="utf-8")
+    assert [path for path in written if "Courses" in path]
+    assert "Python Development" in corpus and "streams" in corpus
+
+
+def test_failed_page_without_a_cached_copy_keeps_the_family_files(fixture_site, tmp_path, monkeypatch):
+    out = tmp_path / "pdfs"
+    crawler.write_outputs(crawler.crawl(fixture_site.url, workers=2)[0], str(out))
+    corpus_path = out / "Sunbeam_Modular_Courses_COMPLETE_INFO.jsonl"
+    before = corpus_path.read_text(encoding="utf-8")
+
+    # A fresh cache has nothing to stand in for the failed page
+    cache = CrawlCache(str(tmp_path / "crawl_cache.sqlite3"))
+    python = fixture_site.url + "/modular-courses/python-development"
+    fail_page(monkeypatch, python)
+    by_family, _, _, changes = crawler.crawl(fixture_site.url, workers=2, cache=cache)
+    assert changes["courses"]["failed"] == [python]
+    crawler.write_outputs(by_family, str(out), changes)
+    assert corpus_path.read_text(encoding="utf-8") == before
+    # What changed in the family is found again once the page is back
+    monkeypatch.undo()
+    _, _, _, changes = crawler.crawl(fixture_site.url, workers=2, cache=cache)
+    assert {page["url"] for page in changes["courses"]["added"]} == {
+        python, fixture_site.url + "/modular-courses/core-java"
+    }
+
+
+def test_browser_rendered_record_is_not_revalidated_by_304(fixture_site, tmp_path):
+    cache = CrawlCache(str(tmp_path / "crawl_cache.sqlite3"))
+    react = {"kind": "course", "family": "courses", "url": fixture_site.url + "/modular-courses/react"}
+    java = {"kind": "course", "family": "courses", "url": fixture_site.url + "/modular-courses/core-java"}
+    stale = {"title": "React", "sections": [{"title": "Syllabus", "content": "v1"}]}
+    for job, tier in ((react, "browser"), (java, "http")):
+        _, validators = crawler.http_fetch.get_html(job["url"])
+        cache.update(job["family"], job["kind"], job["url"], stale, etag=validators["etag"], fetch_tier=tier)
+
+    # The JS-only shell is unchanged, yet the page goes back to the browser
+    result, validators = crawler.fetch_http(react, cache=cache)
+    assert result is None and not validators.get("not_modified")
+    result, validators = crawler.fetch_http(java, cache=cache)
+    assert validators["not_modified"] and result == stale
+
+
+class FakeDriver:
+    def quit(self):
+        self.quit_called = True
+
+
+def test_pool_keeps_a_browser_whose_page_timed_out(monkeypatch):
+    monkeypatch.setattr(crawler, "make_driver", lambda headless=True: FakeDriver())
+    pool = crawler.DriverPool(size=1)
+
+    with pytest.raises(crawler.TimeoutException):
+        with pool.driver() as driver:
+            raise crawler.TimeoutException("heading")
+    with pool.driver() as same:
+        assert same is driver
+
+    with pytest.raises(crawler.WebDriverException):
+        with pool.driver() as driver:
+            raise crawler.WebDriverException("chrome not reachable")
+    assert driver.quit_called
+    with pool.driver() as replacement:
+        assert replacement is not driver
+
+
+def test_report_records_the_tier_of_every_url(fixture_site, tmp_path):
+    _, failures, tiers, changes = crawler.crawl(fixture_site.url, workers=2)
+    report = crawler.write_report(str(tmp_path / "crawl_report.json"), changes, failures, tiers, [])
+
+    assert report["tiers"]["http"] == len(PATHS)
+    assert report["tier_by_url"] == {fixture_site.url + path: "http" for path in PATHS}
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("requests")
+
+import http_fetch
+from conftest import ROUTES, read_fixture
+
+# Saved pages with the payload Chrome's bulk extraction (crawler.EXTRACT_JS)
+# returns for them
+BROWSER_PAGES = {
+    "about-us.html": ("about-us.json", ".panel-body"),
+    "branches.html": ("branches.json", ".panel-body"),
+    "branch-1.html": ("branch-1.json", ".panel-body"),
+    "branch-5.html": ("branch-5.json", ".panel-body"),
+    "modular-courses.html": ("modular-courses.json", ".panel-body"),
+    "course-python.html": ("course-python.json", ".panel-body"),
+    "course-java.html": ("course-java.json", ".panel-body"),
+    "internship.html": ("internship.json", ".panel-collapse"),
+}
+
+
+def lines(text):
+    # innerText's blank lines and cell tabs carry no content
+    return [" ".join(line.split()) for line in text.split("\n") if line.strip()]
+
+
+@pytest.mark.parametrize("page", sorted(BROWSER_PAGES))
+def test_parse_page_matches_browser_extraction(page):
+    expected_name, body_selector = BROWSER_PAGES[page]
+    expected = json.loads(read_fixture("browser", expected_name))
+    payload, _ = http_fetch.parse_page(read_fixture("site", page), body_selector)
+
+    assert payload["title"] == expected["title"]
+    assert lines(payload["overview"]) == lines(expected["overview"])
+    assert lines(payload["body"]) == lines(expected["body"])
+    assert [(p["heading"], lines(p["body"])) for p in payload["panels"]] == [
+        (p["heading"], lines(p["body"])) for p in expected["panels"]
+    ]
+
+
+def test_inline_tags_stay_on_their_line():
+    payload, _ = http_fetch.parse_page(read_fixture("site", "about-us.html"), ".panel-body")
+    assert (
+        "Sunbeam Infotech was founded in 1998 and now runs training centres in Pune and Karad."
+        in payload["body"].split("\n")
+    )
+
+
+def test_page_built_by_javascript_needs_a_browser():
+    _, soup = http_fetch.parse_page(read_fixture("site", "course-js-only.html"), ".panel-body")
+    assert not http_fetch.has_expected(soup, "course")
+
+
+def test_discover_links():
+    _, soup = http_fetch.parse_page(read_fixture("site", "modular-courses-home.html"), ".panel-body")
+    assert http_fetch.discover_links(soup, "http://127.0.0.1/modular-courses-home") == [
+        "http://127.0.0.1/modular-courses/python-development",
+        "http://127.0.0.1/modular-courses/core-java",
+        "https://example.com/modular-courses/elsewhere",
+    ]
+
+
+def test_get_html_sends_validators(fixture_site):
+    url = fixture_site.url + "/internship"
+    html, validators = http_fetch.get_html(url)
+    assert html == read_fixture("site", ROUTES["/internship"])
+    assert validators["etag"]
+
+    html, _ = http_fetch.get_html(url, headers={"If-None-Match": validators["etag"]})
+    assert html is None
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pypdf")
+pytest.importorskip("langchain_text_splitters")
+
+import index_versions
+import rag
+import resources
+from conftest import CountingEmbeddings, write_courses
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # rag.ingest_pdfs against the compact store in a temp dir
+    db_path = str(tmp_path / "db")
+    folder = tmp_path / "pdfs"
+    folder.mkdir()
+    embeddings = CountingEmbeddings()
+    monkeypatch.setattr(resources, "DB_PATH", db_path)
+    monkeypatch.setattr(resources, "VECTOR_STORE", "compact")
+    monkeypatch.setattr(resources, "_live", {"stamp": None, "name": None, "collection": None})
+    monkeypatch.setitem(resources._resources, "embeddings", embeddings)
+    return db_path, folder, embeddings
+
+
+def version_dirs(db_path):
+    versions = os.path.join(db_path, index_versions.VERSIONS_DIR)
+    return sorted(name for name in os.listdir(versions) if os.path.isdir(os.path.join(versions, name)))
+
+
+def test_build_is_published_and_a_rerun_is_a_no_op(store):
+    db_path, folder, embeddings = store
+    write_courses(folder, ["Java", "Python"])
+
+    first = rag.ingest_pdfs(str(folder), workers=1)
+    assert first["embedded"] == 4
+    assert index_versions.active_version(db_path)["name"] == first["version"]
+    assert resources.get_collection().count() == 4
+    assert rag.ingest_status()["state"] == "idle"
+
+    embeddings.texts.clear()
+    again = rag.ingest_pdfs(str(folder), workers=1)
+    assert (again["embedded"], again["version"]) == (0, first["version"])
+    assert embeddings.texts == []
+    assert version_dirs(db_path) == [first["version"]]
+
+
+def test_swap_keeps_the_previous_version_and_collects_older_ones(store):
+    db_path, folder, embeddings = store
+    names = []
+    for courses in (["Java"], ["Java", "Python"], ["Java", "Python", "React"]):
+        write_courses(folder, courses)
+        before = resources.get_collection()
+        result = rag.ingest_pdfs(str(folder), workers=1)
+        names.append(result["version"])
+        # Readers holding the old version keep seeing it; new ones see the build
+        assert resources.get_collection() is not before
+        assert resources.get_collection().count() == 2 * len(courses)
+        # Only the changed course is embedded; the rest is copied from the live version
+        assert {text.split()[0] for text in embeddings.texts[-2:]} == {courses[-1]}
+
+    assert result["dropped_versions"] == [names[0]]
+    assert version_dirs(db_path) == sorted(names[1:])
+    assert [v["name"] for v in index_versions.read_json(
+        os.path.join(db_path, index_versions.VERSIONS_DIR, "history.json"))] == names[1:]
+
+
+def test_unpublished_leftovers_are_collected(store):
+    db_path, folder, _ = store
+    write_courses(folder, ["Java"])
+    rag.ingest_pdfs(str(folder), workers=1)
+    # A build killed before publishing left its folder behind
+    leftover = index_versions.new_version(db_path, resources.COLLECTION_NAME)
+
+    write_courses(folder, ["Java", "Python"])
+    result = rag.ingest_pdfs(str(folder), workers=1)
+    assert leftover["name"] in result["dropped_versions"]
+    assert leftover["name"] not in version_dirs(db_path)
+
+
+def test_failed_build_is_cleaned_up_and_the_live_version_kept(store, monkeypatch):
+    db_path, folder, embeddings = store
+    write_courses(folder, ["Java"])
+    live = rag.ingest_pdfs(str(folder), workers=1)["version"]
+
+    def broken(texts):
+        raise RuntimeError("embedding model crashed")
+
+    monkeypatch.setattr(embeddings, "embed_documents", broken)
+    write_courses(folder, ["Java", "Python"])
+    with pytest.raises(RuntimeError):
+        rag.ingest_pdfs(str(folder), workers=1)
+
+    assert rag.ingest_status()["state"] == "failed"
+    assert index_versions.active_version(db_path)["name"] == live
+    assert version_dirs(db_path) == [live]
+    assert resources.get_collection().count() == 2
@@ -0,0 +1,79 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pypdf")
+pytest.importorskip("langchain_text_splitters")
+
+import ingest
+from conftest import CountingEmbeddings, write_courses
+from vector_store import CompactCollection
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    folder = tmp_path / "pdfs"
+    folder.mkdir()
+    collection = CompactCollection(str(tmp_path / "store"))
+    embeddings = CountingEmbeddings()
+
+    def ingest_corpus(**kwargs):
+        return ingest.ingest_pdfs(
+            collection, embeddings, str(folder), manifest_path=str(tmp_path / "manifest.json"),
+            workers=1, **kwargs
+        )
+
+    return folder, collection, embeddings, ingest_corpus
+
+
+def test_inserting_a_course_only_embeds_its_sections(corpus):
+    folder, collection, embeddings, ingest_corpus = corpus
+    write_courses(folder, ["Java", "Python", "React"])
+    assert ingest_corpus()["embedded"] == 6
+
+    # A new course at the top shifts every line below it
+    embeddings.texts.clear()
+    write_courses(folder, ["DAC", "Java", "Python", "React"])
+    result = ingest_corpus()
+    assert (result["embedded"], result["deleted"]) == (2, 0)
+    assert all(text.startswith("DAC") for text in embeddings.texts)
+
+    write_courses(folder, ["DAC", "Java", "React"])
+    result = ingest_corpus()
+    assert (result["embedded"], result["deleted"]) == (0, 2)
+    assert {metadata["course"] for metadata in collection.get()["metadatas"]} == {"DAC", "Java", "React"}
+
+
+def test_unchanged_files_are_skipped_and_removed_ones_deleted(corpus):
+    folder, collection, embeddings, ingest_corpus = corpus
+    write_courses(folder, ["Java", "Python"])
+    write_courses(folder, ["DAC"], name="Sunbeam_Internship.jsonl")
+    ingest_corpus()
+
+    embeddings.texts.clear()
+    result = ingest_corpus()
+    assert (result["embedded"], result["deleted"], result["skipped_files"]) == (0, 0, 2)
+    assert embeddings.texts == []
+
+    (folder / "Sunbeam_Internship.jsonl").unlink()
+    result = ingest_corpus()
+    assert (result["embedded"], result["deleted"], result["skipped_files"]) == (0, 2, 1)
+    assert collection.count() == 4
+    assert "DAC" not in {metadata["course"] for metadata in collection.get()["metadatas"]}
+
+
+@pytest.mark.parametrize("change", ["chunking", "embedding model"])
+def test_changed_settings_rebuild_everything(corpus, monkeypatch, change):
+    folder, collection, embeddings, ingest_corpus = corpus
+    write_courses(folder, ["Java", "Python"])
+    first = ingest_corpus(embed_model_name="model-a")
+
+    embeddings.texts.clear()
+    if change == "chunking":
+        monkeypatch.setattr(ingest, "CHUNKING", "sections-next")
+        result = ingest_corpus(embed_model_name="model-a")
+    else:
+        result = ingest_corpus(embed_model_name="model-b")
+    assert (result["embedded"], result["skipped_files"]) == (4, 0)
+    assert len(embeddings.texts) == 4
+    assert collection.count() == 4
+    assert result["corpus_version"] != first["corpus_version"]
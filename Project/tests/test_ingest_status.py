@@ -0,0 +1,27 @@
+import os
+
+import index_versions
+import rag
+import resources
+
+
+def test_running_status_of_a_dead_build_is_interrupted(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources, "DB_PATH", str(tmp_path))
+    index_versions.write_status(str(tmp_path), "running", version="v2")
+
+    status = rag.ingest_status()
+
+    assert status["state"] == "interrupted"
+    assert status["version"] == "v2"
+    assert index_versions.read_status(str(tmp_path))["state"] == "interrupted"
+
+
+def test_running_status_is_kept_while_the_build_holds_the_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources, "DB_PATH", str(tmp_path))
+    index_versions.write_status(str(tmp_path), "running", version="v2")
+    lock = index_versions.FileLock(os.path.join(str(tmp_path), index_versions.LOCK_NAME))
+    assert lock.acquire(blocking=False)
+    try:
+        assert rag.ingest_status()["state"] == "running"
+    finally:
+        lock.release()
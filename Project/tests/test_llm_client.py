@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import llm_client
+import metrics
+from llm_client import FakeLLMError, FaultyFakeLLM, ResilientLLM
+
+
+@pytest.fixture(autouse=True)
+def counters(monkeypatch):
+    # Fresh per-model counters, and retries without the real backoff pauses
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    monkeypatch.setattr(llm_client, "backoff", lambda attempt: 0.01)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def model_counters(name):
+    return metrics.snapshot()[f"llm.model.{name}"]["counters"]
+
+
+def test_rate_limit_is_retried():
+    llm = ResilientLLM([("primary", FaultyFakeLLM(["ok"], errors=[429, 429]))], deadline=2, retries=2)
+
+    assert llm.invoke("q") == "ok"
+    counters = model_counters("primary")
+    assert (counters["calls"], counters["errors"], counters["retries"]) == (3, 2, 2)
+
+
+def test_bad_request_is_neither_retried_nor_sent_to_the_fallback():
+    llm = ResilientLLM([
+        ("primary", FaultyFakeLLM(["ok"], errors=[400])),
+        ("fallback", FaultyFakeLLM(["fallback"])),
+    ], deadline=2, retries=2)
+
+    with pytest.raises(FakeLLMError) as error:
+        llm.invoke("q")
+    assert error.value.status_code == 400
+    counters = model_counters("primary")
+    assert (counters["calls"], counters["retries"], counters["fallbacks"]) == (1, 0, 0)
+    assert "llm.model.fallback" not in metrics.snapshot()
+
+
+def test_slow_primary_falls_back_within_the_deadline():
+    llm = ResilientLLM([
+        ("primary", FaultyFakeLLM(["slow"], latency=1.0)),
+        ("fallback", FaultyFakeLLM(["fallback"])),
+    ], deadline=0.6, fallback_share=0.5)
+
+    start = time.monotonic()
+    assert llm.invoke("q") == "fallback"
+    assert time.monotonic() - start < 0.6
+    primary = model_counters("primary")
+    assert (primary["timeouts"], primary["fallbacks"]) == (1, 1)
+    assert model_counters("fallback")["calls"] == 1
+
+
+def test_last_model_timing_out_raises():
+    llm = ResilientLLM([("primary", FaultyFakeLLM(["slow"], latency=1.0))], deadline=0.2)
+
+    with pytest.raises(llm_client.LLMTimeout):
+        llm.invoke("q")
+    assert model_counters("primary")["timeouts"] == 1
+
+
+def test_slow_request_is_hedged():
+    latencies = iter([1.0, 0.0])
+    llm = ResilientLLM(
+        [("primary", FaultyFakeLLM(["hedged"], token_delay=0, latency=lambda: next(latencies)))],
+        deadline=2, hedge_after=0.1
+    )
+
+    start = time.monotonic()
+    assert "".join(llm.stream("q")) == "hedged"
+    assert time.monotonic() - start < 0.8
+    counters = model_counters("primary")
+    assert (counters["hedges"], counters["calls"], counters["errors"]) == (1, 2, 0)
+
+
+def test_fallback_gets_threads_while_primary_calls_are_stuck():
+    llm = ResilientLLM([
+        ("primary", FaultyFakeLLM(["slow"], latency=1.5)),
+        ("fallback", FaultyFakeLLM(["fallback"])),
+    ], deadline=0.6, fallback_share=0.5, max_workers=2)
+
+    # Four concurrent users in a brownout: every primary thread is stuck
+    with ThreadPoolExecutor(max_workers=4) as users:
+        answers = list(users.map(lambda _: llm.invoke("q"), range(4)))
+    assert answers == ["fallback"] * 4
+    assert model_counters("fallback")["timeouts"] == 0
+
+
+class Chunk:
+    def __init__(self, content):
+        self.content = content
+
+
+class StreamingModel:
+    # A chat model stream: an empty first chunk, then pieces `delay` apart
+    def __init__(self, pieces, first_delay, delay):
+        self.pieces = pieces
+        self.first_delay = first_delay
+        self.delay = delay
+
+    def stream(self, prompt):
+        yield Chunk("")
+        time.sleep(self.first_delay)
+        for piece in self.pieces:
+            yield Chunk(piece)
+            time.sleep(self.delay)
+
+
+def test_stream_text_times_the_first_token_and_the_whole_answer():
+    timing = {}
+    pieces = llm_client.stream_text(StreamingModel(["Fees ", "are ", "low"], first_delay=0.1, delay=0.05), "q", timing)
+
+    assert next(pieces) == "Fees "
+    assert timing["ttft"] == pytest.approx(0.1, abs=0.05)
+    assert "total" not in timing
+    assert "".join(pieces) == "are low"
+    assert timing["total"] == pytest.approx(0.25, abs=0.05)
+
+
+def test_stream_text_without_text_sets_ttft_to_total():
+    timing = {}
+    assert list(llm_client.stream_text(StreamingModel([], first_delay=0.05, delay=0), "q", timing)) == []
+    assert timing["ttft"] == timing["total"] > 0
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("reportlab")
+pypdf = pytest.importorskip("pypdf")
+
+import pdf_export
+
+RECORDS = [
+    {"url": f"http://site/{i}", "title": f"Course {i}",
+     "sections": [{"title": "Syllabus", "content": "\n".join(f"Topic {i}.{n}" for n in range(60))}]}
+    for i in range(3)
+]
+
+
+def page_texts(path):
+    return [page.extract_text() for page in pypdf.PdfReader(path).pages]
+
+
+def test_renderer_lays_out_the_same_pages_as_write_pdf(tmp_path):
+    single = pdf_export.write_pdf(str(tmp_path / "single.pdf"), "Courses", RECORDS)
+
+    renderer = pdf_export.PdfRenderer(workers=2)
+    try:
+        # Pages the crawler handed over early, and one it did not
+        renderer.submit(RECORDS[2])
+        renderer.submit(RECORDS[0])
+        merged = renderer.write(str(tmp_path / "merged.pdf"), "Courses", RECORDS)
+    finally:
+        renderer.close()
+
+    texts = page_texts(merged)
+    assert texts == page_texts(single)
+    assert texts[0].strip() == "Courses"
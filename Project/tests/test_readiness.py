@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+import readiness
+
+
+def test_only_successful_waits_train_the_timeout():
+    timeouts = readiness.AdaptiveTimeouts()
+    ready = readiness.Readiness(driver=None, timeouts=timeouts)
+
+    assert ready.until("present:.panel-body", lambda driver: True)
+    assert timeouts.timeout("present:.panel-body") == readiness.MIN_TIMEOUT
+
+    # A page without panels times out: counted as waiting, not learned from
+    assert ready.optional("expanded:panel", lambda driver: False, timeout=0.2) is None
+    assert timeouts.timeout("expanded:panel") == readiness.MAX_TIMEOUT
+    assert ready.waits["expanded:panel"] >= 0.2
+    assert ready.waited >= ready.waits["expanded:panel"]
+
+
+def test_timeout_widens_on_retry():
+    timeouts = readiness.AdaptiveTimeouts()
+    timeouts.observe("heading", 0.5)
+
+    assert timeouts.timeout("heading") == readiness.MIN_TIMEOUT
+    assert timeouts.timeout("heading", attempt=1) == 2 * readiness.MIN_TIMEOUT
+    assert timeouts.timeout("heading", attempt=10) == readiness.MAX_TIMEOUT
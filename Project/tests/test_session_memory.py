@@ -0,0 +1,73 @@
+import pytest
+
+import resources
+import session_memory
+from rag_service import RagService
+
+
+class FakeEmbeddings:
+    # Two-dimensional vectors: enough for blend() and cosine()
+    def embed_documents(self, texts):
+        return [[1.0, float(len(text) % 7)] for text in texts]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setitem(resources._resources, "query_cache", None)
+    service = RagService(FakeEmbeddings(), max_wait=0)
+    yield service
+    service.close()
+
+
+def test_answer_cache_turn_is_remembered_without_a_search(service):
+    service.call(service.remember("chat", "What is the fee of the DAC course?"))
+
+    (turn,) = service.memory.recent("chat")
+    assert turn["topic"] == "What is the fee of the DAC course?"
+    assert turn["hits"] is None
+    # A follow-up to it is planned against its topic; nothing is reused
+    search_text, _, topic = session_memory.plan("and its duration?", [1.0, 0.0], [turn])
+    assert topic == "What is the fee of the DAC course?"
+    assert search_text.startswith(topic)
+    assert session_memory.reusable([turn], turn["search_embedding"], None, "v1") is None
+    assert session_memory.overlap([{"id": "a"}], turn["hits"]) == 0.0
+
+
+@pytest.mark.parametrize("question", [
+    "DAC course fees",
+    "Internship eligibility",
+    "Is there a hostel facility in Pune?",
+    "Which courses do you offer for freshers this year?",
+    "Which courses that cover Java are online?",
+    "Is it possible to join online?",
+    "Is it true that the fees include the hostel?",
+])
+def test_new_topics_are_not_follow_ups(question):
+    assert not session_memory.is_follow_up(question)
+
+
+@pytest.mark.parametrize("question", [
+    "And the duration?",
+    "What about the Karad branch?",
+    "What are its fees?",
+    "Is it available online?",
+    "Is it available to freshers?",
+    "Is that course available in Pune?",
+    "What is the fee for that batch?",
+    "Are these courses online?",
+    "Does that include placement support?",
+    "What are the fees for this?",
+    "Can I pay for that in instalments?",
+    "इसकी फीस कितनी है?",
+    "त्याची फी किती आहे?",
+])
+def test_follow_ups(question):
+    assert session_memory.is_follow_up(question)
+
+
+def test_follow_up_bypasses_the_shared_answer_cache_without_memory(service):
+    # After a restart or TTL expiry the chat is forgotten; the answer cache,
+    # keyed by wording alone, would serve another chat's referent
+    assert service.memory.recent("chat") == []
+    assert service.cached_answer("What is the fee for that batch?", "English", chat="chat") == (None, None)
+    assert service.cached_answer("Is it available to freshers?", "English") == (None, None)
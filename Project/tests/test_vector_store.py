@@ -0,0 +1,92 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vector_store import CompactCollection, dequantize, matches, quantize
+
+
+@pytest.fixture(params=["float16", "int8"])
+def dtype(request):
+    return request.param
+
+
+def unit(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_quantize_round_trip(dtype):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(20, 64)) * 10
+
+    rows, scales = quantize(embeddings, dtype)
+    assert rows.dtype == np.dtype(dtype)
+    assert (scales is None) == (dtype == "float16")
+    # Rows come back L2-normalized, within the dtype's rounding
+    restored = dequantize(rows, scales)
+    assert np.abs(restored - unit(embeddings)).max() < 0.01
+
+
+def test_quantize_keeps_zero_rows_and_rejects_unknown_dtypes():
+    rows, scales = quantize([[0.0, 0.0], [3.0, 4.0]], "int8")
+    assert dequantize(rows, scales)[0].tolist() == [0.0, 0.0]
+    with pytest.raises(ValueError):
+        quantize([[1.0]], "bfloat16")
+
+
+def test_matches_where_syntax():
+    metadata = {"course": "Java", "section": "Fees", "page": 3}
+
+    assert matches(metadata, {"course": "Java"})
+    assert not matches(metadata, {"course": "Python"})
+    assert matches(metadata, {"section": {"$in": ["Fees", "Syllabus"]}})
+    assert not matches(metadata, {"course": {"$nin": ["Java"]}})
+    assert matches(metadata, {"$and": [{"course": "Java"}, {"page": {"$ne": 4}}]})
+    assert matches(metadata, {"$or": [{"course": "Python"}, {"section": {"$eq": "Fees"}}]})
+    assert not matches(metadata, {"$or": [{"course": "Python"}, {"missing": "x"}]})
+
+
+@pytest.fixture
+def store(tmp_path, dtype):
+    collection = CompactCollection(str(tmp_path / "store"), dtype=dtype)
+    collection.upsert(
+        ["java", "python", "react"],
+        [[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 0.0, 1.0]],
+        documents=["java fees", "python fees", "react syllabus"],
+        metadatas=[{"course": "Java"}, {"course": "Python"}, {"course": "React"}],
+    )
+    return collection
+
+
+def test_query_orders_by_distance(store):
+    result = store.query([[1.0, 0.1, 0.0]], n_results=3)
+
+    assert result["ids"] == [["java", "python", "react"]]
+    distances = result["distances"][0]
+    assert distances == sorted(distances)
+    assert distances[0] == pytest.approx(2 - 2 * unit([[1.0, 0.1, 0.0]])[0, 0], abs=0.01)
+
+
+def test_where_filters_get_query_and_delete(store):
+    where = {"course": {"$in": ["Python", "React"]}}
+
+    assert store.get(where=where)["ids"] == ["python", "react"]
+    assert store.query([[1.0, 0.0, 0.0]], n_results=1, where=where)["ids"] == [["python"]]
+    assert store.query([[1.0, 0.0, 0.0]], where={"course": "DAC"})["ids"] == [[]]
+
+    store.delete(where={"course": "React"})
+    assert store.get()["ids"] == ["java", "python"]
+
+
+def test_upsert_replaces_an_existing_id(store, tmp_path, dtype):
+    store.upsert(["java"], [[0.0, 0.0, 1.0]], documents=["java syllabus"], metadatas=[{"course": "Java"}])
+
+    assert store.count() == 3
+    assert store.get(ids=["java"])["documents"] == ["java syllabus"]
+    # The other rows are copied as stored, and the new vector is what a query finds
+    assert store.query([[0.0, 0.0, 1.0]], n_results=2)["ids"] == [["react", "java"]]
+    assert store.query([[1.0, 0.0, 0.0]], n_results=1)["ids"] == [["python"]]
+
+    # Another process opening the store sees the same records
+    reopened = CompactCollection(str(tmp_path / "store"), dtype=dtype)
+    assert reopened.get(ids=["java"], include=["embeddings"])["embeddings"][0] == pytest.approx([0, 0, 1], abs=0.01)
@@ -0,0 +1,271 @@
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+
+STORE_NAME = "compact_store"
+RECORDS_NAME = "records.json"
+# "float16" halves Chroma's float32 vectors; "int8" quarters them (one
+# float32 scale per row). Both keep exact, deterministic top-k.
+DTYPE = "float16"
+
+
+# =========================
+# QUANTIZATION
+# =========================
+def quantize(embeddings, dtype=DTYPE):
+    # Rows are L2-normalized first, so a dot product is the cosine similarity
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales = np.where(scales == 0, 1, scales).astype(np.float32)
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales
+    raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+
+def dequantize(rows, scales):
+    rows = np.asarray(rows, dtype=np.float32)
+    return rows if scales is None else rows * np.asarray(scales)[:, None]
+
+
+def matches(metadata, where):
+    # The subset of Chroma's where syntax used by this project
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, part) for part in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+# =========================
+# MEMORY-MAPPED COLLECTION
+# =========================
+class CompactCollection:
+    # Drop-in for the Chroma collection calls this project makes (get, add,
+    # upsert, delete, count, query). Vectors are one contiguous quantized
+    # array in a file that every process memory-maps read-only, so loading
+    # costs a JSON read and the pages are shared by the OS. records.json is
+    # the commit point: a writer puts new arrays in fresh files and swaps
+    # records.json last, so readers see the old or the new store, never a mix.
+    def __init__(self, path, dtype=DTYPE):
+        self.path = path
+        self.dtype = dtype
+        self._lock = threading.RLock()
+        self._stamp_seen = None
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    # ---------- storage ----------
+    def _records_path(self):
+        return os.path.join(self.path, RECORDS_NAME)
+
+    def _stamp(self):
+        # os.replace gives records.json a new inode on every commit
+        try:
+            stat = os.stat(self._records_path())
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load(self):
+        for _ in range(3):
+            try:
+                self._open()
+                return
+            except FileNotFoundError:
+                # A writer swapped the store between reading records.json
+                # and mapping its arrays; read the new records.json
+                continue
+        self._open()
+
+    def _open(self):
+        self._stamp_seen = self._stamp()
+        try:
+            with open(self._records_path(), "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            records = {"dtype": self.dtype, "dim": 0, "ids": [], "documents": [], "metadatas": []}
+
+        vectors = scales = None
+        if records["ids"]:
+            vectors = np.memmap(
+                os.path.join(self.path, records["vectors"]), dtype=records["dtype"],
+                mode="r", shape=(len(records["ids"]), records["dim"])
+            )
+            if records.get("scales"):
+                scales = np.memmap(
+                    os.path.join(self.path, records["scales"]), dtype=np.float32,
+                    mode="r", shape=(len(records["ids"]),)
+                )
+
+        self.dtype = records["dtype"]
+        self.dim = records["dim"]
+        self.ids = records["ids"]
+        self.documents = records["documents"]
+        self.metadatas = records["metadatas"]
+        self.position = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.vectors, self.scales = vectors, scales
+
+    def _refresh(self):
+        # Another process (ingestion) may have rewritten the store
+        if self._stamp() != self._stamp_seen:
+            self._load()
+
+    def _write(self, ids, documents, metadatas, vectors, scales):
+        old_files = [
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.endswith(".bin")
+        ]
+        generation = uuid.uuid4().hex[:12]
+        records = {
+            "dtype": self.dtype,
+            "dim": int(vectors.shape[1]) if len(ids) else self.dim,
+            "ids": ids, "documents": documents, "metadatas": metadatas,
+        }
+        if len(ids):
+            records["vectors"] = f"vectors-{generation}.bin"
+            np.ascontiguousarray(vectors).tofile(os.path.join(self.path, records["vectors"]))
+            if scales is not None:
+                records["scales"] = f"scales-{generation}.bin"
+                np.ascontiguousarray(scales, dtype=np.float32).tofile(os.path.join(self.path, records["scales"]))
+
+        tmp_path = self._records_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, self._records_path())
+        # Open memmaps keep the unlinked files alive until they are dropped
+        for path in old_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._load()
+
+    # ---------- Chroma-compatible API ----------
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return len(self.ids)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        with self._lock:
+            self._refresh()
+            documents = documents or [""] * len(ids)
+            metadatas = metadatas or [{}] * len(ids)
+            new_rows, new_scales = quantize(embeddings, self.dtype)
+
+            replaced = {doc_id for doc_id in ids if doc_id in self.position}
+            keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in replaced]
+            # Existing rows are copied as stored, never re-quantized
+            parts = [np.asarray(self.vectors)[keep]] if keep else []
+            scale_parts = [np.asarray(self.scales)[keep]] if keep and self.scales is not None else []
+            vectors = np.concatenate(parts + [new_rows]) if parts else new_rows
+            scales = None if new_scales is None else (
+                np.concatenate(scale_parts + [new_scales]) if scale_parts else new_scales
+            )
+            self._write(
+                [self.ids[i] for i in keep] + list(ids),
+                [self.documents[i] for i in keep] + list(documents),
+                [self.metadatas[i] for i in keep] + list(metadatas),
+                vectors, scales
+            )
+
+    add = upsert
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            self._refresh()
+            drop = set(ids or [])
+            if where is not None:
+                drop.update(doc_id for doc_id, m in zip(self.ids, self.metadatas) if matches(m, where))
+            keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in drop]
+            if len(keep) == len(self.ids):
+                return
+            self._write(
+                [self.ids[i] for i in keep],
+                [self.documents[i] for i in keep],
+                [self.metadatas[i] for i in keep],
+                np.asarray(self.vectors)[keep] if keep else np.zeros((0, self.dim), dtype=self.dtype),
+                np.asarray(self.scales)[keep] if self.scales is not None and keep else None
+            )
+
+    def _rows(self, ids=None, where=None):
+        if ids is None:
+            rows = range(len(self.ids))
+        else:
+            rows = [self.position[doc_id] for doc_id in ids if doc_id in self.position]
+        if where is not None:
+            rows = [i for i in rows if matches(self.metadatas[i], where)]
+        return list(rows)
+
+    def _result(self, rows, include):
+        result = {"ids": [self.ids[i] for i in rows]}
+        if "documents" in include:
+            result["documents"] = [self.documents[i] for i in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[i] for i in rows]
+        if "embeddings" in include:
+            result["embeddings"] = dequantize(
+                np.asarray(self.vectors)[rows] if rows else np.zeros((0, self.dim)),
+                None if self.scales is None else np.asarray(self.scales)[rows]
+            ).tolist()
+        return result
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None):
+        with self._lock:
+            self._refresh()
+            return self._result(self._rows(ids, where)[:limit], include)
+
+    def query(self, query_embeddings, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        # Exact top-k: one matrix-vector product over the (filtered) rows
+        with self._lock:
+            self._refresh()
+            rows = np.arange(len(self.ids)) if where is None else np.asarray(self._rows(where=where), dtype=np.int64)
+            results = {key: [] for key in ("ids", *include)}
+
+            for query in query_embeddings:
+                query = np.asarray(query, dtype=np.float32)
+                query = query / (np.linalg.norm(query) or 1)
+                if len(rows) == 0:
+                    top = rows
+                    scores = np.zeros(0, dtype=np.float32)
+                else:
+                    matrix = self.vectors if where is None else self.vectors[rows]
+                    scores = np.asarray(matrix, dtype=np.float32) @ query
+                    if self.scales is not None:
+                        scores = scores * (self.scales if where is None else self.scales[rows])
+                    k = min(n_results, len(scores))
+                    best = np.argpartition(-scores, k - 1)[:k]
+                    best = best[np.lexsort((best, -scores[best]))]
+                    top, scores = rows[best], scores[best]
+
+                found = self._result(top.tolist(), include)
+                for key in found:
+                    results[key].append(found[key])
+                if "distances" in include:
+                    # Squared L2 between unit vectors, the same ordering as Chroma's default space
+                    results["distances"].append((2 - 2 * scores).tolist())
+            return results